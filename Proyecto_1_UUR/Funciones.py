@@ -1,21 +1,677 @@
+import csv
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from functools import partial
 
+import numpy as np
+import pandas as pd
+from cobra import Solution
 
 # %%
-def ENM(modelo_base, mu_medido, lista_proteinas, L=None, medio=None):
+def _fijar_cotas(modelo, id_biomasa, mu_medido, lista_proteinas):
+    # v_biom = mu_obs y v_prot = p_obs
+    modelo.reactions.get_by_id(id_biomasa).bounds = (mu_medido, mu_medido)
+    for rid, valor in lista_proteinas.items():
+        modelo.reactions.get_by_id(rid).bounds = (valor, valor)
+
+
+def _usar_simplex_dual(modelo):
+    # optlang reescala el problema de GLPK en cada optimize y, partiendo de la
+    # base anterior, el simplex primal puede quedarse ciclando. El dual (con
+    # respaldo primal) no tiene ese problema y aprovecha igual la base.
+    if modelo.solver.interface.__name__ == "optlang.glpk_interface":
+        from swiglpk import GLP_DUALP
+        modelo.solver.configuration._smcp.meth = GLP_DUALP
+
+
+def _agregar_absoluto(modelo, prefijo):
+    # Una sola variable a >= |v| cuyas dos restricciones se reapuntan al
+    # nutriente de turno; el objetivo (min a) queda fijo para todo el ciclo.
+    interfaz = modelo.solver.interface
+    a = interfaz.Variable(f"{prefijo}_var", lb=0)
+    restricciones = (interfaz.Constraint(a, lb=0, name=f"{prefijo}_ge"),
+                     interfaz.Constraint(a, lb=0, name=f"{prefijo}_le"))
+    modelo.add_cons_vars([a, *restricciones])
+    modelo.objective = interfaz.Objective(a, direction='min')
+    _usar_simplex_dual(modelo)
+    return restricciones
+
+
+def _apuntar_absoluto(modelo, restricciones, nutriente, anterior=None):
+    # Solo cambiamos coeficientes: el problema del solver es el mismo, por lo
+    # que el simplex parte desde la base de la iteración anterior.
+    mayor, menor = restricciones
+    if anterior is not None and anterior != nutriente:
+        rxn = modelo.reactions.get_by_id(anterior)
+        mayor.set_linear_coefficients({rxn.forward_variable: 0, rxn.reverse_variable: 0})
+        menor.set_linear_coefficients({rxn.forward_variable: 0, rxn.reverse_variable: 0})
+    rxn = modelo.reactions.get_by_id(nutriente)
+    # a - v >= 0  y  a + v >= 0, con v = v_forward - v_reverse
+    mayor.set_linear_coefficients({rxn.forward_variable: -1, rxn.reverse_variable: 1})
+    menor.set_linear_coefficients({rxn.forward_variable: 1, rxn.reverse_variable: -1})
+
+
+def _preparar_enm(modelo_base, mu_medido, lista_proteinas, nutrientes_a_evaluar, medio=None, copiar=True, absoluto=True,
+                  anotar=None):
+    inicio = time.perf_counter()
+    model1 = modelo_base.copy() if copiar else modelo_base
+    if medio is not None:
+        model1.medium = medio
+    id_biomasa = modelo_base.reactions.get_by_id(modelo_base.objective.expression.args[0].args[1].name).id
+
+    # Cotas compartidas por todas las iteraciones: se fijan una única vez
+    for nutriente in nutrientes_a_evaluar:
+        model1.reactions.get_by_id(nutriente).bounds = (-1000, 1000)
+    _fijar_cotas(model1, id_biomasa, mu_medido, lista_proteinas)
+    restricciones = _agregar_absoluto(model1, "abs") if absoluto else None
+    if anotar is not None:
+        anotar(None, time.perf_counter() - inicio)
+    return model1, restricciones
+
+
+def _resolver_enm(modelo, restricciones, nutriente, anterior=None, anotar=None):
+    # Retorna (1 si no es esencial, consumo mínimo)
+    inicio = time.perf_counter()
+    _apuntar_absoluto(modelo, restricciones, nutriente, anterior)
+    if anotar is not None:
+        antes, preparado = _iteraciones(modelo), time.perf_counter()
+    valor = modelo.slim_optimize(error_value=np.nan)
+    if anotar is not None:
+        anotar(nutriente, preparado - inicio, time.perf_counter() - preparado, modelo.solver.status,
+               _iteraciones(modelo, antes))
+    if np.isnan(valor):
+        return 0, np.nan
+    no_esencial = 1 if abs(valor) < 1e-8 else 0
+    return no_esencial, modelo.reactions.get_by_id(nutriente).flux
+
+
+def _cribar_enm(modelo, nutrientes):
+    # Pasada en bloque: se minimiza la suma de |v| de los nutrientes aún sin
+    # clasificar. Si un nutriente queda en cero en esa solución, su consumo
+    # mínimo es cero y no es esencial, igual que en su LP individual. Se
+    # repite con los que quedan hasta que una ronda no descarta a ninguno.
+    # Retorna {nutriente: (no esencial, consumo mínimo)} de los clasificados.
+    clasificados = {}
+    pendientes = list(nutrientes)
+    with modelo:
+        interfaz = modelo.solver.interface
+        variables = {}
+        restricciones = []
+        for nut in pendientes:
+            flujo = modelo.reactions.get_by_id(nut).flux_expression
+            variables[nut] = interfaz.Variable(f"criba_var_{nut}", lb=0)
+            restricciones.append(interfaz.Constraint(variables[nut] - flujo, lb=0, name=f"criba_ge_{nut}"))
+            restricciones.append(interfaz.Constraint(variables[nut] + flujo, lb=0, name=f"criba_le_{nut}"))
+        modelo.add_cons_vars(list(variables.values()) + restricciones)
+        modelo.objective = interfaz.Objective(sum(variables.values()), direction='min')
+
+        while pendientes:
+            if np.isnan(modelo.slim_optimize(error_value=np.nan)):
+                # Todos los LPs individuales comparten esta región factible
+                if not clasificados:
+                    clasificados = {nut: (0, np.nan) for nut in pendientes}
+                break
+            flujos = {nut: modelo.reactions.get_by_id(nut).flux for nut in pendientes}
+            ceros = [nut for nut in pendientes if abs(flujos[nut]) < 1e-8]
+            if not ceros:
+                break
+            for nut in ceros:
+                clasificados[nut] = (1, flujos[nut]) # No esencial
+            modelo.solver.objective.set_linear_coefficients({variables[nut]: 0 for nut in ceros})
+            pendientes = [nut for nut in pendientes if nut not in clasificados]
+    return clasificados
+
+
+def _ENM_reutilizado(modelo_base, mu_medido, lista_proteinas, nutrientes_a_evaluar, medio=None, n_jobs=None, cache=None,
+                     cribado=False, anotar=None):
+    argumentos = (modelo_base, mu_medido, lista_proteinas, nutrientes_a_evaluar, medio)
+    pendientes = list(nutrientes_a_evaluar)
+    resultados = {}
+    nuevos = {}
+    model1 = None
+
+    # Solo se resuelven los LPs que no están en el cache
+    if cache is not None:
+        model1, restricciones = _preparar_enm(*argumentos, anotar=anotar)
+        claves = dict(zip(pendientes, _claves_lp(model1, "ENM", nutrientes_a_evaluar, pendientes)))
+        guardados = cache.leer(claves.values())
+        resultados = {nut: guardados[clave] for nut, clave in claves.items() if clave in guardados}
+        pendientes = [nut for nut in pendientes if nut not in resultados]
+
+    # La criba descarta en bloque a los no esenciales; el LP exacto queda
+    # solo para los nutrientes que no se pudieron clasificar
+    if cribado and pendientes:
+        if model1 is None:
+            model1, restricciones = _preparar_enm(*argumentos, anotar=anotar)
+        nuevos.update(_cribar_enm(model1, pendientes))
+        pendientes = [nut for nut in pendientes if nut not in nuevos]
+
+    if _es_paralelo(n_jobs):
+        nuevos.update(zip(pendientes, _en_paralelo(n_jobs, _iniciar_enm, argumentos, _tarea_enm, pendientes)))
+    else:
+        if model1 is None and pendientes:
+            model1, restricciones = _preparar_enm(*argumentos, anotar=anotar)
+        anterior = None
+        while pendientes:
+            nutriente_objetivo = pendientes.pop(0)
+            nuevos[nutriente_objetivo] = _resolver_enm(model1, restricciones, nutriente_objetivo, anterior, anotar)
+            anterior = nutriente_objetivo
+            if cribado and not np.isnan(nuevos[nutriente_objetivo][1]):
+                # La solución de este LP también puede dejar en cero a otros nutrientes
+                flujos = {nut: model1.reactions.get_by_id(nut).flux for nut in pendientes}
+                nuevos.update((nut, (1, flujo)) for nut, flujo in flujos.items() if abs(flujo) < 1e-8)
+                pendientes = [nut for nut in pendientes if nut not in nuevos]
+
+    resultados.update(nuevos)
+    if cache is not None:
+        cache.guardar({claves[nut]: (int(r[0]), float(r[1])) for nut, r in nuevos.items()})
+
+    bool_array = np.array([resultados[nut][0] for nut in nutrientes_a_evaluar], dtype=int)
+    minimum_uptake = np.array([resultados[nut][1] for nut in nutrientes_a_evaluar], dtype=float)
+    return bool_array, minimum_uptake
+
+
+def _preparar_uof(modelo_base, mu_medido, lista_proteinas, esenciales, minimos_esenciales, no_esenciales, medio=None, copiar=True,
+                  absoluto=True, anotar=None):
+    inicio = time.perf_counter()
+    model2 = modelo_base.copy() if copiar else modelo_base
+    if medio is not None:
+        model2.medium = medio
+    biom_id = model2.reactions.get_by_id(model2.objective.expression.args[0].args[1].name).id
+
+    _fijar_cotas(model2, biom_id, mu_medido, lista_proteinas)
+    forzados = []
+    for k, nombre_es in enumerate(esenciales):
+        rx = model2.reactions.get_by_id(nombre_es)
+        if abs(rx.upper_bound)<abs(minimos_esenciales[k]):
+            rx.bounds = minimos_esenciales[k],minimos_esenciales[k]
+            forzados.append(nombre_es)
+    restricciones = _agregar_absoluto(model2, "uof") if absoluto else None
+    if anotar is not None:
+        anotar(None, time.perf_counter() - inicio, forzados=forzados)
+    return model2, restricciones
+
+
+def _resolver_uof(modelo, restricciones, nutriente, anterior=None, ids_duales=None, anotar=None):
+    # Solo el nutriente objetivo se abre; al terminar recupera sus cotas del medio
+    inicio = time.perf_counter()
+    rxn_act = modelo.reactions.get_by_id(nutriente)
+    cotas = rxn_act.bounds
+    rxn_act.bounds = (-1000, 1000)
+    _apuntar_absoluto(modelo, restricciones, nutriente, anterior)
+    if anotar is not None:
+        antes, preparado = _iteraciones(modelo), time.perf_counter()
+    if ids_duales is None:
+        opt = modelo.optimize()
+    else:
+        # Sin armar la Solution: estado, objetivo y solo los precios sombra pedidos
+        valor = modelo.slim_optimize(error_value=np.nan)
+        precios = None if np.isnan(valor) else np.array([modelo.constraints[met_id].dual for met_id in ids_duales])
+        opt = (modelo.solver.status, valor, precios)
+    if anotar is not None:
+        anotar(nutriente, preparado - inicio, time.perf_counter() - preparado, modelo.solver.status,
+               _iteraciones(modelo, antes))
+    rxn_act.bounds = cotas
+    return opt
+
+
+def _iterar_uof(modelo_base, mu_medido, lista_proteinas, esenciales, minimos_esenciales, no_esenciales, medio=None,
+                n_jobs=None, cache=None, ids_duales=None, anotar=None):
+    # Entrega (nutriente, resultado) en el orden de no_esenciales apenas se
+    # resuelve cada LP. El resultado es una Solution o, si se piden ids_duales,
+    # la tupla (estado, objetivo, precios sombra de esos metabolitos).
+    argumentos = (modelo_base, mu_medido, lista_proteinas, esenciales, minimos_esenciales, no_esenciales, medio)
+    pendientes = list(no_esenciales)
+    guardados = {}
+    model2 = None
+
+    if cache is not None:
+        model2, restricciones = _preparar_uof(*argumentos, anotar=anotar)
+        ids_metabolitos = [met.id for met in model2.metabolites]
+        if ids_duales is not None:
+            posiciones = pd.Index(ids_metabolitos).get_indexer(ids_duales)
+        claves = dict(zip(pendientes, _claves_lp(model2, "UOF", list(esenciales) + pendientes, pendientes)))
+        leidos = cache.leer(claves.values())
+        guardados = {nut: leidos[clave] for nut, clave in claves.items() if clave in leidos}
+        pendientes = [nut for nut in pendientes if nut not in guardados]
+
+    # El cache guarda el vector completo de precios, así que en ese caso se piden todos
+    ids_lp = ids_duales if cache is None else None
+    if _es_paralelo(n_jobs):
+        nuevos = _en_paralelo(n_jobs, _iniciar_uof, argumentos + (ids_lp,), _tarea_uof, pendientes)
+    else:
+        if model2 is None:
+            model2, restricciones = _preparar_uof(*argumentos, anotar=anotar)
+        nuevos = _resolver_uof_seguidos(model2, restricciones, pendientes, ids_lp, anotar)
+
+    for nut in no_esenciales:
+        if nut in guardados:
+            registro = guardados[nut]
+        else:
+            resultado = next(nuevos)
+            if cache is None:
+                yield nut, resultado
+                continue
+            registro = _registro_solucion(resultado)
+            cache.guardar({claves[nut]: registro})
+            if ids_duales is None:
+                # Recién resuelto: la Solution completa, con flujos
+                yield nut, resultado
+                continue
+
+        # Leídas del cache solo se tienen estado, objetivo y precios sombra (fluxes=None)
+        if ids_duales is None:
+            yield nut, _solucion_guardada(registro, ids_metabolitos)
+        else:
+            estado, objetivo, precios = registro
+            yield nut, (estado, objetivo, None if precios is None else precios[posiciones])
+
+
+def _resolver_uof_seguidos(modelo, restricciones, nutrientes, ids_duales=None, anotar=None):
+    anterior = None
+    for nut_no_esencial in nutrientes:
+        yield _resolver_uof(modelo, restricciones, nut_no_esencial, anterior, ids_duales, anotar)
+        anterior = nut_no_esencial
+
+
+def _UOF_reutilizado(modelo_base, mu_medido, lista_proteinas, esenciales, minimos_esenciales, no_esenciales, medio=None,
+                     n_jobs=None, cache=None, anotar=None):
+    return list(_iterar_uof(modelo_base, mu_medido, lista_proteinas, esenciales, minimos_esenciales, no_esenciales,
+                            medio=medio, n_jobs=n_jobs, cache=cache, anotar=anotar))
+
+
+# %%
+# Backend matricial: el modelo preparado se pasa una sola vez a matrices
+# dispersas y cada LP se resuelve directo con HiGHS (scipy.optimize.linprog),
+# sin la capa simbólica de cobra/optlang ni un solver comercial.
+_ESTADOS_HIGHS = {0: "optimal", 1: "iteration_limit", 2: "infeasible", 3: "unbounded"}
+
+
+def _matrices_modelo(modelo):
+    from cobra.util.array import create_stoichiometric_matrix
+    from scipy.sparse import csr_matrix, hstack
+
+    # Variables: los flujos v y, al final, la variable a >= |v_nutriente|
+    S = create_stoichiometric_matrix(modelo, array_type="lil").tocsr()
+    return {
+        "A_eq": hstack([S, csr_matrix((S.shape[0], 1))], format="csr"),
+        "cotas": np.array([rxn.bounds for rxn in modelo.reactions], dtype=float),
+        "indice": {rxn.id: j for j, rxn in enumerate(modelo.reactions)},
+        "ids_reacciones": [rxn.id for rxn in modelo.reactions],
+        "ids_metabolitos": [met.id for met in modelo.metabolites],
+    }
+
+
+def _minimizar_absoluto_highs(matrices, nutriente, cotas=None):
+    from scipy.optimize import linprog
+    from scipy.sparse import csr_matrix
+
+    cotas = matrices["cotas"] if cotas is None else cotas
+    n, k = cotas.shape[0], matrices["indice"][nutriente]
+    # v_k - a <= 0  y  -v_k - a <= 0
+    A_ub = csr_matrix(([1.0, -1.0, -1.0, -1.0], ([0, 0, 1, 1], [k, n, k, n])), shape=(2, n + 1))
+    c = np.zeros(n + 1)
+    c[n] = 1
+    return linprog(c, A_ub=A_ub, b_ub=np.zeros(2), A_eq=matrices["A_eq"], b_eq=np.zeros(matrices["A_eq"].shape[0]),
+                   bounds=np.vstack([cotas, [0, np.inf]]), method="highs")
+
+
+def _ENM_highs(modelo_base, mu_medido, lista_proteinas, nutrientes_a_evaluar, medio=None, anotar=None):
+    bool_array = np.zeros(len(nutrientes_a_evaluar), dtype=int)
+    minimum_uptake = np.zeros(len(nutrientes_a_evaluar))
+
+    model1, _ = _preparar_enm(modelo_base, mu_medido, lista_proteinas, nutrientes_a_evaluar, medio=medio, absoluto=False,
+                              anotar=anotar)
+    inicio = time.perf_counter()
+    matrices = _matrices_modelo(model1)
+    if anotar is not None:
+        # El paso a matrices queda como una segunda preparación
+        anotar(None, time.perf_counter() - inicio)
+    for i, nutriente_objetivo in enumerate(nutrientes_a_evaluar):
+        inicio = time.perf_counter()
+        res = _minimizar_absoluto_highs(matrices, nutriente_objetivo)
+        if anotar is not None:
+            anotar(nutriente_objetivo, 0.0, time.perf_counter() - inicio, _ESTADOS_HIGHS.get(res.status, "undefined"),
+                   res.nit)
+        if res.status != 0:
+            minimum_uptake[i] = np.nan
+            continue
+        if abs(res.fun) < 1e-8:
+            bool_array[i] = 1 # No esencial
+        minimum_uptake[i] = res.x[matrices["indice"][nutriente_objetivo]]
+    return bool_array, minimum_uptake
+
+
+def _iterar_uof_highs(modelo_base, mu_medido, lista_proteinas, esenciales, minimos_esenciales, no_esenciales, medio=None,
+                      ids_duales=None, anotar=None):
+    # Mismo contrato que _iterar_uof: Solution o (estado, objetivo, precios de ids_duales)
+    model2, _ = _preparar_uof(modelo_base, mu_medido, lista_proteinas, esenciales, minimos_esenciales, no_esenciales,
+                              medio=medio, absoluto=False, anotar=anotar)
+    inicio = time.perf_counter()
+    matrices = _matrices_modelo(model2)
+    if anotar is not None:
+        # El paso a matrices queda como una segunda preparación
+        anotar(None, time.perf_counter() - inicio)
+    if ids_duales is not None:
+        posiciones = pd.Index(matrices["ids_metabolitos"]).get_indexer(ids_duales)
+    propios = dict(zip(no_esenciales, _indices_duales(model2, no_esenciales)))
+    n = len(matrices["ids_reacciones"])
+
+    for nut in no_esenciales:
+        inicio = time.perf_counter()
+        cotas = matrices["cotas"].copy()
+        cotas[matrices["indice"][nut]] = (-1000, 1000)
+        preparado = time.perf_counter()
+        res = _minimizar_absoluto_highs(matrices, nut, cotas)
+        estado = _ESTADOS_HIGHS.get(res.status, "undefined")
+        if anotar is not None:
+            anotar(nut, preparado - inicio, time.perf_counter() - preparado, estado, res.nit)
+        optimo = res.status == 0
+        precios = res.eqlin.marginals if optimo else None
+        if optimo and abs(res.fun) < 1e-8:
+            # Convención de UOF: con v_nutriente = 0 el precio de su propio
+            # metabolito (cualquiera en [-1, 1]) queda en 0; HiGHS puede dar ±1
+            precios = precios.copy()
+            precios[propios[nut]] = 0.0
+        if ids_duales is not None:
+            yield nut, (estado, res.fun, None if precios is None else precios[posiciones])
+        elif optimo:
+            yield nut, Solution(res.fun, estado, pd.Series(res.x[:n], index=matrices["ids_reacciones"], name="fluxes"),
+                                shadow_prices=pd.Series(precios, index=matrices["ids_metabolitos"],
+                                                        name="shadow_prices"))
+        else:
+            yield nut, Solution(None, estado, None)
+
+
+def _revisar_backend(backend, n_jobs=None, cache=None, cribado=False):
+    paralelo = _es_paralelo(n_jobs)  # también rechaza n_jobs=0 antes de preparar nada
+    if backend not in ("cobra", "highs"):
+        raise ValueError(f"Backend desconocido: {backend!r}. Usa 'cobra' o 'highs'.")
+    if backend == "highs" and (paralelo or cache is not None or cribado):
+        raise ValueError("El backend 'highs' no admite n_jobs, cache ni cribado.")
+
+
+# %%
+# Cache en disco de resultados de ENM/UOF. Cada LP se identifica por el hash
+# de todo lo que lo define, así que al cambiar un nutriente solo se vuelven a
+# resolver los LPs que realmente cambian.
+def _claves_lp(modelo, etapa, nutrientes, objetivos):
+    listados = set(nutrientes)
+    huella = hashlib.sha256(etapa.encode())
+    huella.update(repr([met.id for met in modelo.metabolites]).encode())
+    for rxn in modelo.reactions:
+        coeficientes = sorted((met.id, float(coef)) for met, coef in rxn.metabolites.items())
+        # Las cotas de los nutrientes van aparte porque dependen del objetivo
+        cotas = None if rxn.id in listados else (float(rxn.lower_bound), float(rxn.upper_bound))
+        huella.update(repr((rxn.id, cotas, coeficientes)).encode())
+
+    cotas_nutrientes = {nut: tuple(map(float, modelo.reactions.get_by_id(nut).bounds)) for nut in nutrientes}
+    claves = []
+    for objetivo in objetivos:
+        huella_lp = huella.copy()
+        cotas_lp = dict(cotas_nutrientes, **{objetivo: (-1000.0, 1000.0)})
+        huella_lp.update(repr((objetivo, sorted(cotas_lp.items()))).encode())
+        claves.append(huella_lp.hexdigest())
+    return claves
+
+
+def _registro_solucion(sol):
+    precios = None if sol.shadow_prices is None else sol.shadow_prices.to_numpy(dtype=float)
+    return sol.status, sol.objective_value, precios
+
+
+def _solucion_guardada(registro, ids_metabolitos):
+    estado, objetivo, precios = registro
+    precios = None if precios is None else pd.Series(precios, index=ids_metabolitos, name="shadow_prices")
+    return Solution(objetivo, estado, None, shadow_prices=precios)
+
+
+class CacheResultados:
+    """Resultados de LPs guardados en un archivo SQLite.
+
+    Cuando el archivo supera `max_bytes` se borran primero las entradas que
+    llevan más tiempo sin usarse.
+    """
+
+    def __init__(self, ruta, max_bytes=256 * 2**20):
+        self.ruta = os.fspath(ruta)
+        self.max_bytes = max_bytes
+        with closing(sqlite3.connect(self.ruta)) as con, con:
+            con.execute("CREATE TABLE IF NOT EXISTS resultados "
+                        "(clave TEXT PRIMARY KEY, valor BLOB, tamano INTEGER, uso REAL)")
+
+    def leer(self, claves):
+        claves = list(claves)
+        encontrados = {}
+        with closing(sqlite3.connect(self.ruta)) as con, con:
+            for i in range(0, len(claves), 500):
+                grupo = claves[i:i + 500]
+                marcas = ",".join("?" * len(grupo))
+                filas = con.execute(f"SELECT clave, valor FROM resultados WHERE clave IN ({marcas})", grupo)
+                encontrados.update((clave, pickle.loads(valor)) for clave, valor in filas)
+                con.execute(f"UPDATE resultados SET uso = ? WHERE clave IN ({marcas})", [time.time(), *grupo])
+        return encontrados
+
+    def guardar(self, pares):
+        if not pares:
+            return
+        ahora = time.time()
+        filas = []
+        for clave, valor in pares.items():
+            datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+            filas.append((clave, datos, len(datos), ahora))
+        with closing(sqlite3.connect(self.ruta)) as con, con:
+            con.executemany("INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?)", filas)
+            self._desalojar(con)
+
+    def _desalojar(self, con):
+        total = con.execute("SELECT COALESCE(SUM(tamano), 0) FROM resultados").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        borrar = []
+        for clave, tamano in con.execute("SELECT clave, tamano FROM resultados ORDER BY uso").fetchall():
+            if total <= self.max_bytes:
+                break
+            borrar.append((clave,))
+            total -= tamano
+        con.executemany("DELETE FROM resultados WHERE clave = ?", borrar)
+
+
+def _abrir_cache(cache):
+    # Se acepta la ruta del archivo o un CacheResultados ya creado
+    if cache is None or isinstance(cache, CacheResultados):
+        return cache
+    return CacheResultados(cache)
+
+
+# %%
+# Ejecución en paralelo: cada proceso recibe el modelo una sola vez (en el
+# inicializador del pool) y lo prepara; las tareas solo envían el nombre del
+# nutriente, de modo que el modelo no se vuelve a serializar por tarea.
+_trabajador = {}
+
+
+def _iniciar_enm(modelo_base, mu_medido, lista_proteinas, nutrientes_a_evaluar, medio):
+    modelo, restricciones = _preparar_enm(modelo_base, mu_medido, lista_proteinas, nutrientes_a_evaluar, medio=medio, copiar=False)
+    _trabajador.update(modelo=modelo, restricciones=restricciones, anterior=None)
+
+
+def _tarea_enm(nutriente):
+    resultado = _resolver_enm(_trabajador["modelo"], _trabajador["restricciones"], nutriente, _trabajador["anterior"])
+    _trabajador["anterior"] = nutriente
+    return resultado
+
+
+def _iniciar_uof(modelo_base, mu_medido, lista_proteinas, esenciales, minimos_esenciales, no_esenciales, medio,
+                ids_duales=None):
+    modelo, restricciones = _preparar_uof(modelo_base, mu_medido, lista_proteinas, esenciales, minimos_esenciales,
+                                      no_esenciales, medio=medio, copiar=False)
+    _trabajador.update(modelo=modelo, restricciones=restricciones, anterior=None, ids_duales=ids_duales)
+
+
+def _tarea_uof(nutriente):
+    resultado = _resolver_uof(_trabajador["modelo"], _trabajador["restricciones"], nutriente, _trabajador["anterior"],
+                              _trabajador["ids_duales"])
+    _trabajador["anterior"] = nutriente
+    return resultado
+
+
+def _es_paralelo(n_jobs):
+    # n_jobs como en joblib: None o 1 en este proceso, -1 todos los núcleos,
+    # -2 todos menos uno, etc.
+    if n_jobs == 0:
+        raise ValueError("n_jobs no puede ser 0: usa None o 1 (un proceso), un número de procesos o -1 (todos los "
+                         "núcleos).")
+    return n_jobs is not None and n_jobs != 1
+
+
+def _en_paralelo(n_jobs, iniciar, argumentos, tarea, elementos):
+    # map conserva el orden original de los nutrientes y entrega cada
+    # resultado apenas está listo
+    elementos = list(elementos)
+    if not elementos:
+        return
+    if n_jobs < 0:
+        n_jobs = max(1, os.cpu_count() + 1 + n_jobs)
+    n_jobs = min(n_jobs, len(elementos))
+    bloque = max(1, len(elementos) // (4 * n_jobs))
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=iniciar, initargs=argumentos) as pool:
+        yield from pool.map(tarea, elementos, chunksize=bloque)
+
+
+# %%
+# Instrumentación opcional: cada LP (y cada preparación del modelo) genera un
+# diccionario con tiempos, estado e iteraciones. `instrumentar` puede ser una
+# función que recibe cada registro o la ruta de un archivo JSON-lines.
+def _abrir_instrumentacion(instrumentar):
+    if instrumentar is None or callable(instrumentar):
+        return instrumentar
+
+    def escribir(registro):
+        with open(instrumentar, "a") as f:
+            f.write(json.dumps(registro) + "\n")
+    return escribir
+
+
+def _anotar(registro, etapa, modo, nutriente, t_preparacion, t_resolucion=None, estado=None, iteraciones=None,
+            forzados=None):
+    # nutriente=None marca la preparación compartida por todos los LPs
+    registro({
+        "etapa": etapa,
+        "modo": modo,
+        "nutriente": nutriente,
+        "t_preparacion": t_preparacion,
+        "t_resolucion": t_resolucion,
+        "estado": estado,
+        "iteraciones": None if iteraciones is None else int(iteraciones),
+        "forzados": [] if forzados is None else [str(nut) for nut in forzados],
+    })
+
+
+def _anotador(instrumentar, etapa, reutilizar=False, n_jobs=None, cache=None, cribado=False, backend="cobra"):
+    # Función anotar(nutriente, t_preparacion, ...) con la etapa y el modo ya fijados
+    registro = _abrir_instrumentacion(instrumentar)
+    if registro is None:
+        return None
+    if _es_paralelo(n_jobs):
+        raise ValueError("La instrumentación no admite n_jobs: los LPs se resuelven en otros procesos.")
+    if backend == "highs":
+        modo = "highs"
+    elif reutilizar or cache is not None or cribado:
+        modo = "reutilizar"
+    else:
+        modo = "original"
+    return partial(_anotar, registro, etapa, modo)
+
+
+def _iteraciones(modelo, antes=None):
+    # Iteraciones simplex del último LP. GLPK lleva un contador acumulado, así
+    # que se descuenta lo leído antes de resolver (antes=_iteraciones(modelo)).
+    interfaz = modelo.solver.interface.__name__
+    problema = modelo.solver.problem
+    try:
+        if interfaz == "optlang.glpk_interface":
+            from swiglpk import glp_get_it_cnt
+            return glp_get_it_cnt(problema) - (antes or 0)
+        if interfaz == "optlang.gurobi_interface":
+            return int(problema.IterCount)
+        if interfaz == "optlang.cplex_interface":
+            return problema.solution.progress.get_num_iterations()
+    except Exception:
+        pass
+    return None
+
+
+def resumen_instrumentacion(registros):
+    """Tabla resumen por etapa y modo a partir de los registros de `instrumentar`.
+
+    `registros` es una lista de diccionarios o la ruta del archivo JSON-lines.
+    """
+    if isinstance(registros, (str, os.PathLike)):
+        with open(registros) as f:
+            registros = [json.loads(linea) for linea in f if linea.strip()]
+    tabla = pd.DataFrame(list(registros), columns=["etapa", "modo", "nutriente", "t_preparacion", "t_resolucion",
+                                                   "estado", "iteraciones", "forzados"])
+    tabla["lp"] = tabla["nutriente"].notna()
+    tabla["no_optimo"] = tabla["lp"] & (tabla["estado"] != "optimal")
+    tabla["con_forzados"] = tabla["forzados"].map(len) > 0
+    lps = tabla[tabla["lp"]]
+    resumen = tabla.groupby(["etapa", "modo"]).agg(
+        lps=("lp", "sum"),
+        no_optimos=("no_optimo", "sum"),
+        t_preparacion=("t_preparacion", "sum"),
+        t_resolucion=("t_resolucion", "sum"),
+        iteraciones=("iteraciones", "sum"),
+        con_forzados=("con_forzados", "sum"),
+    )
+    resumen["t_resolucion_medio"] = lps.groupby(["etapa", "modo"])["t_resolucion"].mean()
+    resumen["t_resolucion_max"] = lps.groupby(["etapa", "modo"])["t_resolucion"].max()
+    return resumen
+
+
+# %%
+def ENM(modelo_base, mu_medido, lista_proteinas, L=None, medio=None, reutilizar=False, n_jobs=None, cache=None,
+        cribado=False, backend="cobra", instrumentar=None):
     # Determinamos qué nutrientes evaluar: las llaves del medio o la lista L
     nutrientes_a_evaluar = list(medio.keys()) if medio is not None else L
     if nutrientes_a_evaluar is None:
         raise ValueError("Debes proporcionar al menos una lista L o un diccionario de medio.")
+
+    # instrumentar (función o archivo JSON-lines) recibe un registro por LP
+    anotar = _anotador(instrumentar, "ENM", reutilizar, n_jobs, cache, cribado, backend)
+
+    # backend="highs" resuelve los LPs en forma matricial con scipy/HiGHS
+    _revisar_backend(backend, n_jobs, cache, cribado)
+    if backend == "highs":
+        return _ENM_highs(modelo_base, mu_medido, lista_proteinas, nutrientes_a_evaluar, medio=medio, anotar=anotar)
+
+    # Modo rápido: un solo problema para todos los nutrientes, sin contextos.
+    # n_jobs reparte los nutrientes entre procesos (-1 usa todos los núcleos,
+    # -2 todos menos uno)
+    # y cache evita resolver de nuevo los LPs ya guardados en disco. cribado
+    # clasifica en bloque a los no esenciales antes de los LPs individuales.
+    if reutilizar or _es_paralelo(n_jobs) or cache is not None or cribado:
+        return _ENM_reutilizado(modelo_base, mu_medido, lista_proteinas, nutrientes_a_evaluar, medio=medio,
+                                n_jobs=n_jobs, cache=_abrir_cache(cache), cribado=cribado, anotar=anotar)
     
     bool_array = np.zeros(len(nutrientes_a_evaluar), dtype=int)
     minimum_uptake = np.zeros(len(nutrientes_a_evaluar))
 
     # Creamos el modelo base para esta corrida y aplicamos el medio
+    inicio = time.perf_counter()
     model1 = modelo_base.copy()
     if medio is not None:
         model1.medium = medio
 
     sol_opt = model1.optimize()
+    if anotar is not None:
+        anotar(None, time.perf_counter() - inicio)
     
 
  
@@ -26,6 +682,7 @@ def ENM(modelo_base, mu_medido, lista_proteinas, L=None, medio=None):
 
     # Usamos la lista de nutrientes detectada al inicio
     for i, nutriente_objetivo in enumerate(nutrientes_a_evaluar):
+        inicio = time.perf_counter()
         with model1 as modelo_temp:
 
 
@@ -61,7 +718,12 @@ def ENM(modelo_base, mu_medido, lista_proteinas, L=None, medio=None):
             modelo_temp.objective = a
             modelo_temp.objective.direction = 'min'    
 
+            if anotar is not None:
+                antes, preparado = _iteraciones(modelo_temp), time.perf_counter()
             solucion = modelo_temp.optimize()
+            if anotar is not None:
+                anotar(nutriente_objetivo, preparado - inicio, time.perf_counter() - preparado, solucion.status,
+                       _iteraciones(modelo_temp, antes))
 
 
             
@@ -80,14 +742,39 @@ def ENM(modelo_base, mu_medido, lista_proteinas, L=None, medio=None):
 
 
 # %%
-def UOF(modelo_base, mu_medido, lista_proteinas, matriz, valores_minimos, L=None, medio=None):
+def UOF(modelo_base, mu_medido, lista_proteinas, matriz, valores_minimos, L=None, medio=None, reutilizar=False, n_jobs=None,
+        cache=None, backend="cobra", instrumentar=None):
+    """Minimiza el consumo de cada nutriente no esencial de ENM, con los esenciales disponibles.
+
+    Retorna (esenciales, soluciones), con una tupla (nutriente, Solution)
+    por nutriente no esencial. `mapa_calor` usa los precios sombra de los
+    metabolitos de los nutrientes. Si el consumo mínimo de un nutriente es
+    cero, el precio de su propio metabolito no es único (cualquier valor en
+    [-1, 1] es óptimo): por convención queda en 0, que es lo que entrega
+    GLPK por cobra, y `backend="highs"` lo fija igual. Los precios de otros
+    metabolitos en LPs degenerados pueden cambiar según el solver.
+    """
 
 
     #Obtenemos los utrientes del diccionario o de la lista
     nutrientes_a_evaluar = list(medio.keys()) if medio is not None else L
 
-   
+    anotar = _anotador(instrumentar, "UOF", reutilizar, n_jobs, cache, backend=backend)
+    _revisar_backend(backend, n_jobs, cache)
+    if reutilizar or _es_paralelo(n_jobs) or cache is not None or backend == "highs":
+        nutrientes = np.array(nutrientes_a_evaluar)
+        esenciales = nutrientes[matriz == 0]
+        argumentos = (modelo_base, mu_medido, lista_proteinas, list(esenciales), list(valores_minimos[matriz == 0]),
+                      list(nutrientes[matriz == 1]))
+        if backend == "highs":
+            soluciones = list(_iterar_uof_highs(*argumentos, medio=medio, anotar=anotar))
+        else:
+            soluciones = _UOF_reutilizado(*argumentos, medio=medio, n_jobs=n_jobs, cache=_abrir_cache(cache),
+                                          anotar=anotar)
+        return esenciales, soluciones
+
     #Copiamos el modelo el insertamos el meio en caso de haber recibido uno
+    inicio = time.perf_counter()
     model2 = modelo_base.copy()
     if medio is not None:
         model2.medium = medio
@@ -95,6 +782,8 @@ def UOF(modelo_base, mu_medido, lista_proteinas, matriz, valores_minimos, L=None
     sol_opt = model2.optimize()
     biom_id = model2.reactions.get_by_id(model2.objective.expression.args[0].args[1].name).id 
     p_medida = list(lista_proteinas.values())
+    if anotar is not None:
+        anotar(None, time.perf_counter() - inicio)
 
 
    
@@ -107,6 +796,8 @@ def UOF(modelo_base, mu_medido, lista_proteinas, matriz, valores_minimos, L=None
 
     for i, nut_no_esencial in enumerate(no_esenciales):
         # 4. Uso de 'with' para velocidad
+        inicio = time.perf_counter()
+        forzados = []
         with model2 as modelo_temp2:
             
             # Fijar Biomasa usando el ID de texto
@@ -124,8 +815,8 @@ def UOF(modelo_base, mu_medido, lista_proteinas, matriz, valores_minimos, L=None
             for k, nombre_es in enumerate(esenciales):
                 rx = modelo_temp2.reactions.get_by_id(nombre_es)
                 if abs(rx.upper_bound)<abs(minimos_esenciales[k]):
-                    print("it happened")
                     rx.bounds = minimos_esenciales[k],minimos_esenciales[k]
+                    forzados.append(nombre_es)
 
             # Configuración del nutriente no esencial objetivo
             rxn_act = modelo_temp2.reactions.get_by_id(nut_no_esencial)
@@ -144,54 +835,195 @@ def UOF(modelo_base, mu_medido, lista_proteinas, matriz, valores_minimos, L=None
             modelo_temp2.objective.direction = 'min'
             
             # Optimización
+            if anotar is not None:
+                antes, preparado = _iteraciones(modelo_temp2), time.perf_counter()
             opt = modelo_temp2.optimize()
+            if anotar is not None:
+                anotar(nut_no_esencial, preparado - inicio, time.perf_counter() - preparado, opt.status,
+                       _iteraciones(modelo_temp2, antes), forzados)
             soluciones.append((nut_no_esencial, opt))
 
     return esenciales, soluciones
 
 
 # %%
-def mapa_calor(modelo_base, mu_medido, lista_proteinas, L=None, medio=None):
-    # Llamada a ENM para clasificar nutrientes
-    bool_array, minimun_uptakes = ENM(modelo_base, mu_medido, lista_proteinas, L=L, medio=medio)
-    print(bool_array)
-    print(minimun_uptakes)
-    
-    # Llamada a UOF usando los resultados de ENM
-    esenciales_nombres, soluciones = UOF(modelo_base, mu_medido, lista_proteinas, bool_array, minimun_uptakes, L=L, medio=medio)
+def _indices_duales(modelo, nutrientes):
+    # Posición (en model.metabolites, el orden de shadow_prices) del metabolito
+    # que consume cada nutriente
+    return np.array([modelo.metabolites.index(modelo.reactions.get_by_id(nut).reactants[0]) for nut in nutrientes],
+                    dtype=int)
+
+
+# %%
+def _graficar(matriz_plot):
+    # Las librerías de gráficos se cargan solo cuando se pide la figura
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=(12, 8))
+    sns.heatmap(matriz_plot, annot=True, cmap='YlOrRd', fmt=".2f", linewidths=.5)
+    plt.title('Mapa de Calor: Precios Sombra')
+    plt.xlabel('Nutrientes Esenciales')
+    plt.ylabel('Nutrientes No Esenciales')
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+    plt.show()
+
 
-    print(esenciales_nombres)
-    print(soluciones)
+def _escribir_fila(archivo, columnas, nutriente, estado, objetivo, precios):
+    # Archivo CSV de solo agregar: una fila por LP, escrita apenas se resuelve
+    nuevo = not os.path.exists(archivo) or os.path.getsize(archivo) == 0
+    with open(archivo, "a", newline="") as f:
+        escritor = csv.writer(f)
+        if nuevo:
+            escritor.writerow(["nutriente", "estado", "objetivo", *columnas])
+        valores = [np.nan] * len(columnas) if precios is None else np.abs(precios)
+        escritor.writerow([nutriente, estado, objetivo, *valores])
+
+
+# %%
+def mapa_calor(modelo_base, mu_medido, lista_proteinas, L=None, medio=None, reutilizar=False, n_jobs=None, cache=None,
+               archivo=None, graficar=True, cribado=False, backend="cobra", instrumentar=None):
+    """Calcula la matriz de precios sombra (no esenciales x nutrientes) y la grafica.
+
+    Con `graficar=False` no se imprime nada ni se cargan matplotlib/seaborn;
+    los resultados de UOF se procesan a medida que se resuelven y solo se
+    guardan los precios sombra de la matriz. Con `archivo` cada resultado se
+    agrega como fila a un CSV apenas se resuelve. Retorna la matriz como DataFrame.
+    """
+    cache = _abrir_cache(cache)
+    instrumentar = _abrir_instrumentacion(instrumentar)
+    # Llamada a ENM para clasificar nutrientes
+    bool_array, minimun_uptakes = ENM(modelo_base, mu_medido, lista_proteinas, L=L, medio=medio, reutilizar=reutilizar,
+                                      n_jobs=n_jobs, cache=cache, cribado=cribado, backend=backend,
+                                      instrumentar=instrumentar)
+    if graficar:
+        print(bool_array)
+        print(minimun_uptakes)
 
     # Separación de nutrientes para la matriz (basado en bool_array)
     nutrientes_arr = np.array(list(medio.keys()) if medio is not None else L)
     esenciales = nutrientes_arr 
     no_esenciales = nutrientes_arr[bool_array == 1]
 
-    # Crear DataFrame para Precios Sombra
-    matriz_dual = pd.DataFrame(index=no_esenciales, columns=esenciales)
+    # Matriz de Precios Sombra: el índice nutriente -> metabolito se arma una
+    # sola vez y cada solución aporta una fila completa con un solo take
+    indices = _indices_duales(modelo_base, esenciales)
+    matriz_dual = np.full((len(no_esenciales), len(esenciales)), np.nan)
 
+    if graficar and archivo is None:
+        # Llamada a UOF usando los resultados de ENM
+        esenciales_nombres, soluciones = UOF(modelo_base, mu_medido, lista_proteinas, bool_array, minimun_uptakes, L=L,
+                                             medio=medio, reutilizar=reutilizar, n_jobs=n_jobs, cache=cache,
+                                             backend=backend, instrumentar=instrumentar)
 
-    for nut_no_es, sol in soluciones:
-        if sol.status == 'optimal':
-            precios_sombra = sol.shadow_prices
-            for nut_es in esenciales:
-                reaccion = modelo_base.reactions.get_by_id(nut_es)
-                met_id = reaccion.reactants[0].id
-                matriz_dual.loc[nut_no_es, nut_es] = abs(precios_sombra[met_id])
+        print(esenciales_nombres)
+        print(soluciones)
+
+        for fila, (nut_no_es, sol) in enumerate(soluciones):
+            if sol.status == 'optimal':
+                np.abs(sol.shadow_prices.to_numpy().take(indices), out=matriz_dual[fila])
+    else:
+        # Modo por lotes: cada LP aporta su fila y se descarta
+        ids_duales = [modelo_base.metabolites[k].id for k in indices]
+        argumentos = (modelo_base, mu_medido, lista_proteinas, list(nutrientes_arr[bool_array == 0]),
+                      list(minimun_uptakes[bool_array == 0]), list(no_esenciales))
+        # En este modo siempre se reutiliza el problema
+        anotar = _anotador(instrumentar, "UOF", True, n_jobs, cache, backend=backend)
+        if backend == "highs":
+            flujo = _iterar_uof_highs(*argumentos, medio=medio, ids_duales=ids_duales, anotar=anotar)
         else:
-            matriz_dual.loc[nut_no_es, :] = np.nan
+            flujo = _iterar_uof(*argumentos, medio=medio, n_jobs=n_jobs, cache=cache, ids_duales=ids_duales,
+                                anotar=anotar)
+        for fila, (nut_no_es, (estado, objetivo, precios)) in enumerate(flujo):
+            if precios is not None:
+                np.abs(precios, out=matriz_dual[fila])
+            if archivo is not None:
+                _escribir_fila(archivo, esenciales, nut_no_es, estado, objetivo, precios)
 
-    matriz_plot = matriz_dual.astype(float)
+    matriz_plot = pd.DataFrame(matriz_dual, index=no_esenciales, columns=esenciales)
+    if graficar:
+        _graficar(matriz_plot)
+    return matriz_plot
 
-    plt.figure(figsize=(12, 8))
-    sns.heatmap(matriz_plot, annot=True, cmap='YlOrRd', fmt=".2f", linewidths=.5)
-    plt.title('Mapa de Calor: Precios Sombra')
-    plt.xlabel('Nutrientes Esenciales')
-    plt.ylabel('Nutrientes No Esenciales')
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.show()
 
+# %%
+def _recorrido_serpiente(n_filas, n_columnas):
+    # Recorremos la grilla en zigzag para que cada punto parta de la base de un vecino
+    for i in range(n_filas):
+        columnas = range(n_columnas) if i % 2 == 0 else reversed(range(n_columnas))
+        for j in columnas:
+            yield i, j
+
+
+def barrido(modelo_base, lista_mu, grilla_proteinas, L=None, medio=None, archivo=None):
+    """Corre ENM y UOF sobre una grilla de tasas de crecimiento y de producción de proteínas.
+
+    `grilla_proteinas` es una lista de diccionarios como `lista_proteinas`,
+    todos con las mismas reacciones. El modelo se copia una sola vez y entre
+    puntos de la grilla solo cambian las cotas de biomasa y proteínas.
+
+    Retorna un diccionario con:
+      precios: arreglo (mu, proteínas, nutriente no esencial, nutriente) con
+               los precios sombra en valor absoluto; las filas de nutrientes
+               esenciales en ese punto quedan en NaN.
+      no_esenciales, minimos: resultados de ENM en cada punto.
+    Si se entrega `archivo` se guarda además como .npz comprimido.
+    """
+    nutrientes = list(medio.keys()) if medio is not None else L
+    if nutrientes is None:
+        raise ValueError("Debes proporcionar al menos una lista L o un diccionario de medio.")
+    lista_mu = list(lista_mu)
+    grilla_proteinas = list(grilla_proteinas)
+    forma = (len(lista_mu), len(grilla_proteinas), len(nutrientes))
+
+    precios = np.full(forma + (len(nutrientes),), np.nan)
+    no_esenciales = np.zeros(forma, dtype=int)
+    minimos = np.full(forma, np.nan)
+
+    # Una sola copia del modelo para toda la grilla
+    modelo = modelo_base.copy()
+    if medio is not None:
+        modelo.medium = medio
+    id_biomasa = modelo_base.reactions.get_by_id(modelo_base.objective.expression.args[0].args[1].name).id
+    rxns_nutrientes = [modelo.reactions.get_by_id(nut) for nut in nutrientes]
+    cotas_medio = [rxn.bounds for rxn in rxns_nutrientes]
+    restricciones = _agregar_absoluto(modelo, "abs")
+    ids_duales = [modelo.metabolites[k].id for k in _indices_duales(modelo, nutrientes)]
+
+    anterior = None
+    for i, j in _recorrido_serpiente(len(lista_mu), len(grilla_proteinas)):
+        _fijar_cotas(modelo, id_biomasa, lista_mu[i], grilla_proteinas[j])
+
+        # ENM: todos los nutrientes abiertos
+        for rxn in rxns_nutrientes:
+            rxn.bounds = (-1000, 1000)
+        for k, nut in enumerate(nutrientes):
+            no_esenciales[i, j, k], minimos[i, j, k] = _resolver_enm(modelo, restricciones, nut, anterior)
+            anterior = nut
 
+        # UOF: cotas del medio y esenciales fijos en su mínimo cuando el medio no alcanza
+        for rxn, cotas in zip(rxns_nutrientes, cotas_medio):
+            rxn.bounds = cotas
+        for k, rxn in enumerate(rxns_nutrientes):
+            if no_esenciales[i, j, k] == 0 and abs(rxn.upper_bound) < abs(minimos[i, j, k]):
+                rxn.bounds = minimos[i, j, k], minimos[i, j, k]
+        for k, nut in enumerate(nutrientes):
+            if no_esenciales[i, j, k] == 1:
+                fila = _resolver_uof(modelo, restricciones, nut, anterior, ids_duales)[2]
+                anterior = nut
+                if fila is not None:
+                    precios[i, j, k] = np.abs(fila)
 
+    resultados = {
+        "precios": precios,
+        "no_esenciales": no_esenciales,
+        "minimos": minimos,
+        "mu": np.array(lista_mu, dtype=float),
+        "ids_proteinas": np.array(list(grilla_proteinas[0]) if grilla_proteinas else [], dtype=str),
+        "proteinas": np.array([list(p.values()) for p in grilla_proteinas], dtype=float),
+        "nutrientes": np.array(nutrientes, dtype=str),
+    }
+    if archivo is not None:
+        np.savez_compressed(archivo, **resultados)
+    return resultados
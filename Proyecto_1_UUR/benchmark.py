@@ -0,0 +1,257 @@
+"""Benchmark de ENM, UOF y mapa_calor sobre redes metabólicas sintéticas.
+
+No necesita el modelo iCHOv1 ni Gurobi: las redes se generan al azar (pero
+siempre factibles) y se resuelven con un solver libre. Cada medición corre en
+un proceso aparte para que el pico de memoria (RSS) sea solo de esa etapa.
+
+Uso:
+    python benchmark.py --salida bench.json
+    python benchmark.py --salida nuevo.json --comparar bench.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from cobra import Metabolite, Model, Reaction
+
+import Funciones
+
+# (metabolitos, reacciones internas, nutrientes, proteínas)
+TAMANOS = {
+    "pequeno": (100, 200, 10, 2),
+    "mediano": (400, 800, 20, 3),
+    "grande": (1500, 3000, 30, 4),
+}
+
+# Opciones de ENM/UOF/mapa_calor que se comparan
+VARIANTES = {
+    "original": {},
+    "reutilizar": {"reutilizar": True},
+    "cribado": {"reutilizar": True, "cribado": True},
+    "highs": {"backend": "highs"},
+}
+
+
+# %%
+def red_sintetica(n_metabolitos, n_reacciones, n_nutrientes, n_proteinas=1, semilla=0):
+    """Genera una red al azar que siempre admite crecimiento.
+
+    Los metabolitos se ordenan en capas: los primeros vienen de los
+    nutrientes y cada uno de los siguientes tiene al menos una reacción que
+    lo produce desde metabolitos anteriores, así que todos se pueden
+    sintetizar. Cada metabolito tiene además una salida (DM_) para que los
+    subproductos no impidan el estado estacionario.
+
+    Retorna (modelo, mu, proteinas, medio) listos para `mapa_calor`.
+    """
+    rng = np.random.default_rng(semilla)
+    modelo = Model(f"sintetico_{n_metabolitos}_{n_reacciones}")
+    internos = [Metabolite(f"m{j}_c", compartment="c") for j in range(n_metabolitos)]
+    reacciones = []
+
+    # Nutrientes: intercambio EX_ (el metabolito externo es su reactante) y transporte
+    for i in range(n_nutrientes):
+        externo = Metabolite(f"n{i}_e", compartment="e")
+        intercambio = Reaction(f"EX_n{i}_e", lower_bound=-10, upper_bound=1000)
+        intercambio.add_metabolites({externo: -1})
+        transporte = Reaction(f"T_n{i}", lower_bound=0, upper_bound=1000)
+        transporte.add_metabolites({externo: -1, internos[i % n_metabolitos]: 1})
+        reacciones += [intercambio, transporte]
+
+    # Una reacción productora por metabolito y el resto al azar entre capas
+    for j in range(n_nutrientes, n_metabolitos):
+        reacciones.append(_reaccion_al_azar(rng, f"R{j}", internos[:j], [internos[j]], reversible=False))
+    for k in range(n_metabolitos, n_reacciones):
+        corte = int(rng.integers(1, n_metabolitos))
+        reacciones.append(_reaccion_al_azar(rng, f"R{k}", internos[:corte], internos[corte:],
+                                            reversible=bool(rng.random() < 0.3)))
+
+    for met in internos:
+        salida = Reaction(f"DM_{met.id}", lower_bound=0, upper_bound=1000)
+        salida.add_metabolites({met: -1})
+        reacciones.append(salida)
+
+    biomasa = Reaction("BIOMASS", lower_bound=0, upper_bound=1000)
+    elegidos = rng.choice(n_metabolitos, size=min(10, n_metabolitos), replace=False)
+    biomasa.add_metabolites({internos[j]: -float(rng.uniform(0.1, 1.0)) for j in elegidos})
+    reacciones.append(biomasa)
+
+    for p in range(n_proteinas):
+        proteina = Reaction(f"DM_prot{p}", lower_bound=0, upper_bound=1000)
+        elegidos = rng.choice(n_metabolitos, size=min(5, n_metabolitos), replace=False)
+        proteina.add_metabolites({internos[j]: -float(rng.uniform(0.1, 1.0)) for j in elegidos})
+        reacciones.append(proteina)
+
+    modelo.add_reactions(reacciones)
+    modelo.objective = "BIOMASS"
+
+    # Tasas medidas: la mitad del crecimiento máximo y, con eso fijo, una
+    # décima de lo que cada proteína alcanza a producir
+    mu = 0.5 * modelo.slim_optimize()
+    proteinas = {}
+    with modelo:
+        modelo.reactions.BIOMASS.bounds = (mu, mu)
+        for p in range(n_proteinas):
+            rid = f"DM_prot{p}"
+            with modelo:
+                modelo.objective = rid
+                proteinas[rid] = 0.1 * modelo.slim_optimize() / n_proteinas
+    medio = {f"EX_n{i}_e": 10.0 for i in range(n_nutrientes)}
+    return modelo, mu, proteinas, medio
+
+
+def _reaccion_al_azar(rng, rid, sustratos, productos, reversible):
+    reaccion = Reaction(rid, lower_bound=-1000 if reversible else 0, upper_bound=1000)
+    coeficientes = {}
+    for met in rng.choice(sustratos, size=min(len(sustratos), int(rng.integers(1, 3))), replace=False):
+        coeficientes[met] = -float(rng.integers(1, 3))
+    for met in rng.choice(productos, size=min(len(productos), int(rng.integers(1, 3))), replace=False):
+        coeficientes[met] = float(rng.integers(1, 3))
+    reaccion.add_metabolites(coeficientes)
+    return reaccion
+
+
+# %%
+@contextmanager
+def _contar_lps():
+    # Todos los caminos terminan en Model.slim_optimize (cobra) o en linprog (highs)
+    import cobra
+    import scipy.optimize
+
+    contador = {"lps": 0}
+    slim_optimize, linprog = cobra.Model.slim_optimize, scipy.optimize.linprog
+
+    def slim_contado(*args, **kwargs):
+        contador["lps"] += 1
+        return slim_optimize(*args, **kwargs)
+
+    def linprog_contado(*args, **kwargs):
+        contador["lps"] += 1
+        return linprog(*args, **kwargs)
+
+    cobra.Model.slim_optimize, scipy.optimize.linprog = slim_contado, linprog_contado
+    try:
+        yield contador
+    finally:
+        cobra.Model.slim_optimize, scipy.optimize.linprog = slim_optimize, linprog
+
+
+def _rss_max_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss viene en KB en Linux y en bytes en macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if platform.system() == "Darwin" else rss / 2**10
+
+
+def _medir(etapa, modelo, mu, proteinas, medio, opciones, clasificacion=None):
+    # Corre dentro de un proceso nuevo: el pico de RSS es solo de esta etapa
+    with _contar_lps() as contador:
+        inicio = time.perf_counter()
+        if etapa == "ENM":
+            resultado = Funciones.ENM(modelo, mu, proteinas, medio=medio, **opciones)
+        elif etapa == "UOF":
+            # El cribado solo existe en ENM
+            opciones = {k: v for k, v in opciones.items() if k != "cribado"}
+            resultado = Funciones.UOF(modelo, mu, proteinas, *clasificacion, medio=medio, **opciones)
+        else:
+            resultado = Funciones.mapa_calor(modelo, mu, proteinas, medio=medio, graficar=False, **opciones)
+        segundos = time.perf_counter() - inicio
+    return resultado, {
+        "lps": contador["lps"],
+        "segundos": segundos,
+        "segundos_por_lp": segundos / contador["lps"] if contador["lps"] else None,
+        "rss_max_mb": _rss_max_mb(),
+    }
+
+
+def _en_proceso_nuevo(*argumentos):
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(_medir, *argumentos).result()
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# %%
+def correr_benchmark(tamanos=("pequeno", "mediano"), variantes=tuple(VARIANTES), solver="glpk", semilla=0, salida=None):
+    """Mide ENM, UOF y mapa_calor para cada tamaño de red y cada variante.
+
+    Retorna un DataFrame con una fila por (tamaño, variante, etapa) y, si se
+    entrega `salida`, guarda todo en un JSON que se puede comparar con
+    `comparar` entre commits.
+    """
+    filas = []
+    for nombre in tamanos:
+        modelo, mu, proteinas, medio = red_sintetica(*TAMANOS[nombre], semilla=semilla)
+        modelo.solver = solver
+        for variante in variantes:
+            opciones = VARIANTES[variante]
+            clasificacion, medida = _en_proceso_nuevo("ENM", modelo, mu, proteinas, medio, opciones)
+            filas.append({"tamano": nombre, "variante": variante, "etapa": "ENM", **medida})
+            for etapa in ("UOF", "mapa_calor"):
+                _, medida = _en_proceso_nuevo(etapa, modelo, mu, proteinas, medio, opciones, clasificacion)
+                filas.append({"tamano": nombre, "variante": variante, "etapa": etapa, **medida})
+            print(f"{nombre:>8} {variante:>10}: " + ", ".join(
+                f"{f['etapa']} {f['segundos']:.2f}s/{f['lps']} LPs" for f in filas[-3:]))
+
+    if salida is not None:
+        with open(salida, "w") as f:
+            json.dump({
+                "commit": _commit_actual(),
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "solver": solver,
+                "semilla": semilla,
+                "tamanos": {nombre: TAMANOS[nombre] for nombre in tamanos},
+                "resultados": filas,
+            }, f, indent=2)
+    return pd.DataFrame(filas)
+
+
+def comparar(archivo_base, archivo_nuevo, tolerancia=0.2):
+    """Compara dos JSON de `correr_benchmark` y marca las regresiones.
+
+    Una fila es regresión si el tiempo crece más que `tolerancia` (20% por
+    defecto) o si resuelve más LPs que antes.
+    """
+    tablas = []
+    for archivo in (archivo_base, archivo_nuevo):
+        with open(archivo) as f:
+            tablas.append(pd.DataFrame(json.load(f)["resultados"]).set_index(["tamano", "variante", "etapa"]))
+    base, nuevo = tablas
+    tabla = base[["lps", "segundos", "rss_max_mb"]].join(nuevo[["lps", "segundos", "rss_max_mb"]], how="inner",
+                                                            lsuffix="_base", rsuffix="_nuevo")
+    tabla["razon_tiempo"] = tabla["segundos_nuevo"] / tabla["segundos_base"]
+    tabla["regresion"] = (tabla["razon_tiempo"] > 1 + tolerancia) | (tabla["lps_nuevo"] > tabla["lps_base"])
+    return tabla
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--salida", default="benchmark_uur.json")
+    parser.add_argument("--tamanos", nargs="+", default=["pequeno", "mediano"], choices=list(TAMANOS))
+    parser.add_argument("--variantes", nargs="+", default=list(VARIANTES), choices=list(VARIANTES))
+    parser.add_argument("--solver", default="glpk")
+    parser.add_argument("--comparar", metavar="BASE", help="JSON anterior contra el cual buscar regresiones")
+    args = parser.parse_args()
+
+    correr_benchmark(args.tamanos, args.variantes, solver=args.solver, salida=args.salida)
+    if args.comparar:
+        tabla = comparar(args.comparar, args.salida)
+        print(tabla.to_string())
+        if tabla["regresion"].any():
+            raise SystemExit("Hay regresiones respecto de " + args.comparar)
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from cobra.io import load_model
+
+from benchmark import red_sintetica
+from Funciones import ENM, UOF, _indices_duales, mapa_calor
+
+# Los caminos nuevos de ENM/UOF contra el original (cobra + GLPK, un LP por
+# nutriente dentro de un contexto) sobre el modelo textbook de E. coli.
+
+pytestmark = pytest.mark.filterwarnings("ignore:Solver status")
+
+PROTEINAS = {"ATPM": 8.39}
+
+
+@pytest.fixture(scope="module")
+def modelo():
+    return load_model("textbook")
+
+
+def medio_textbook(modelo, extra=False):
+    medio = dict(modelo.medium)
+    if extra:
+        # Fuentes alternativas: glucosa y oxígeno dejan de ser esenciales
+        medio.update({"EX_ac_e": 5.0, "EX_fru_e": 3.0, "EX_gln__L_e": 2.0})
+    return medio
+
+
+def mismo_enm(a, b):
+    np.testing.assert_array_equal(a[0], b[0])
+    np.testing.assert_allclose(a[1], b[1], atol=1e-6)
+
+
+@pytest.mark.parametrize("opciones", [{"cribado": True}, {"reutilizar": True}])
+@pytest.mark.parametrize("extra", [False, True])
+@pytest.mark.parametrize("mu", [0.3, 0.5, 0.8])
+def test_enm_igual_al_original(modelo, mu, extra, opciones):
+    medio = medio_textbook(modelo, extra)
+    mismo_enm(ENM(modelo, mu, PROTEINAS, medio=medio, **opciones), ENM(modelo, mu, PROTEINAS, medio=medio))
+
+
+@pytest.mark.parametrize("semilla", range(5))
+def test_cribado_igual_al_original_en_redes_sinteticas(semilla):
+    modelo, mu, proteinas, medio = red_sintetica(40, 80, 8, semilla=semilla)
+    original = ENM(modelo, mu, proteinas, medio=medio)
+    mismo_enm(ENM(modelo, mu, proteinas, medio=medio, cribado=True), original)
+
+    # UOF reutilizando el problema: mismos nutrientes y mismos óptimos
+    _, soluciones = UOF(modelo, mu, proteinas, *original, medio=medio)
+    _, reutilizadas = UOF(modelo, mu, proteinas, *original, medio=medio, reutilizar=True)
+    assert [nut for nut, _ in reutilizadas] == [nut for nut, _ in soluciones]
+    for (_, sol), (_, reutilizada) in zip(soluciones, reutilizadas):
+        assert reutilizada.status == sol.status
+        assert reutilizada.objective_value == pytest.approx(sol.objective_value, abs=1e-6)
+
+
+@pytest.mark.parametrize("extra", [False, True])
+@pytest.mark.parametrize("mu", [0.3, 0.5, 0.8])
+def test_highs_igual_a_glpk(modelo, mu, extra):
+    medio = medio_textbook(modelo, extra)
+    original = ENM(modelo, mu, PROTEINAS, medio=medio)
+    highs = ENM(modelo, mu, PROTEINAS, medio=medio, backend="highs")
+    np.testing.assert_array_equal(highs[0], original[0])
+    np.testing.assert_allclose(highs[1], original[1], atol=1e-6)
+
+    _, soluciones = UOF(modelo, mu, PROTEINAS, *original, medio=medio)
+    _, soluciones_highs = UOF(modelo, mu, PROTEINAS, *original, medio=medio, backend="highs")
+    assert [nut for nut, _ in soluciones_highs] == [nut for nut, _ in soluciones]
+    # Precios sombra con signo de los metabolitos de los nutrientes, incluido
+    # el del propio nutriente de cada fila (la convención de UOF)
+    indices = _indices_duales(modelo, list(medio))
+    for (_, sol), (_, sol_highs) in zip(soluciones, soluciones_highs):
+        assert sol_highs.status == sol.status
+        assert sol_highs.objective_value == pytest.approx(sol.objective_value, abs=1e-6)
+        np.testing.assert_allclose(sol_highs.shadow_prices.to_numpy()[indices], sol.shadow_prices.to_numpy()[indices],
+                                   atol=1e-6)
+
+    matriz = mapa_calor(modelo, mu, PROTEINAS, medio=medio, graficar=False)
+    matriz_highs = mapa_calor(modelo, mu, PROTEINAS, medio=medio, graficar=False, backend="highs")
+    np.testing.assert_allclose(matriz_highs.to_numpy(), matriz.to_numpy(), atol=1e-6)
+
+
+def test_cache_entrega_soluciones_completas_al_resolver(modelo, tmp_path):
+    medio = medio_textbook(modelo, extra=True)
+    clasificacion = ENM(modelo, 0.5, PROTEINAS, medio=medio)
+    _, soluciones = UOF(modelo, 0.5, PROTEINAS, *clasificacion, medio=medio)
+    ruta = tmp_path / "uur.sqlite"
+    _, resueltas = UOF(modelo, 0.5, PROTEINAS, *clasificacion, medio=medio, cache=ruta)
+    _, leidas = UOF(modelo, 0.5, PROTEINAS, *clasificacion, medio=medio, cache=ruta)
+    for (nut, sol), (_, resuelta), (_, leida) in zip(soluciones, resueltas, leidas):
+        # Las recién resueltas traen flujos; las del cache, solo objetivo y precios
+        assert resuelta.fluxes[nut] == pytest.approx(sol.fluxes[nut], abs=1e-6)
+        assert leida.fluxes is None
+        assert leida.objective_value == pytest.approx(resuelta.objective_value, abs=1e-6)
+        np.testing.assert_array_equal(leida.shadow_prices.to_numpy(), resuelta.shadow_prices.to_numpy())
+
+
+@pytest.mark.parametrize("etapa", ["ENM", "UOF", "mapa_calor"])
+def test_n_jobs_cero_es_un_error(modelo, etapa):
+    medio = medio_textbook(modelo)
+    with pytest.raises(ValueError, match="n_jobs"):
+        if etapa == "ENM":
+            ENM(modelo, 0.5, PROTEINAS, medio=medio, n_jobs=0)
+        elif etapa == "UOF":
+            UOF(modelo, 0.5, PROTEINAS, *ENM(modelo, 0.5, PROTEINAS, medio=medio), medio=medio, n_jobs=0)
+        else:
+            mapa_calor(modelo, 0.5, PROTEINAS, medio=medio, n_jobs=0, graficar=False)
+
+
+def test_n_jobs_negativo_como_joblib(modelo):
+    # -2: todos los núcleos menos uno (al menos un proceso)
+    medio = medio_textbook(modelo, extra=True)
+    mismo_enm(ENM(modelo, 0.5, PROTEINAS, medio=medio, n_jobs=-2), ENM(modelo, 0.5, PROTEINAS, medio=medio))
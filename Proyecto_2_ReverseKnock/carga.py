@@ -0,0 +1,123 @@
+import hashlib
+import os
+import pickle
+from contextlib import contextmanager
+
+import cobra
+import optlang
+from cobra import Reaction
+
+# Carga de modelos para todos los scripts de ReverseKnock. El JSON se parsea
+# una sola vez: el modelo ya arreglado (ATPM) queda en un caché binario al
+# lado del archivo y, dentro de cada proceso, en memoria. Desde ahí se
+# entregan copias (`cargar_modelo`) o el mismo modelo dentro de un contexto
+# que deshace los cambios al salir (`prestar_modelo`, lo más barato).
+
+# Cambiar si cambian los arreglos, para invalidar los cachés viejos
+_ARREGLOS = ("ATPM",)
+_modelos = {}
+
+
+def agregar_atpm(modelo):
+    # creamos atpm (el modelo base no la trae)
+    if "ATPM" not in modelo.reactions:
+        atpm = Reaction('ATPM')
+        atpm.name = 'ATP Maintenance'
+        atpm.lower_bound = 0
+        atpm.upper_bound = 1000
+        atpm.add_metabolites({
+            modelo.metabolites.atp_c: -1,
+            modelo.metabolites.h2o_c: -1,
+            modelo.metabolites.adp_c: 1,
+            modelo.metabolites.pi_c:  1,
+            modelo.metabolites.h_c:   1
+        })
+        modelo.add_reactions([atpm])
+    return modelo
+
+
+def _hash(archivo):
+    h = hashlib.sha256()
+    with open(archivo, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _leer_cache(cache, archivo, llave):
+    # El modelo guardado si el caché está vigente; None si no existe, es de
+    # otra versión o quedó truncado o corrupto (se vuelve a leer el JSON)
+    try:
+        with open(cache, "rb") as f:
+            guardada = pickle.load(f)
+            vigente = all(guardada.get(k) == llave[k] for k in ("cobra", "optlang", "arreglos"))
+            sin_cambios = (guardada["mtime"], guardada["tamano"]) == (llave["mtime"], llave["tamano"])
+            if vigente and (sin_cambios or guardada["sha256"] == _hash(archivo)):
+                return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, KeyError, TypeError,
+            ValueError):
+        pass
+    return None
+
+
+def _leer(archivo):
+    # Caché binario válido si coincide la fecha y el tamaño del JSON o, si
+    # el archivo se tocó sin cambiar, su hash. El modelo se guarda con GLPK,
+    # que siempre está, y al leerlo pasa al solver por defecto de cobra: un
+    # caché escrito con Gurobi se puede leer donde no hay gurobipy.
+    cache = archivo + ".cache"
+    info = os.stat(archivo)
+    llave = {"mtime": info.st_mtime_ns, "tamano": info.st_size, "cobra": cobra.__version__,
+             "optlang": optlang.__version__, "arreglos": _ARREGLOS}
+    modelo = _leer_cache(cache, archivo, llave)
+    if modelo is None:
+        modelo = agregar_atpm(cobra.io.load_json_model(archivo))
+        modelo.solver = "glpk"
+        llave["sha256"] = _hash(archivo)
+        try:
+            with open(cache + ".tmp", "wb") as f:
+                pickle.dump(llave, f)
+                pickle.dump(modelo, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(cache + ".tmp", cache)
+        except OSError:
+            pass  # sin permiso de escritura se sigue sin caché
+    modelo.solver = cobra.Configuration().solver
+    return modelo
+
+
+def _maestro(archivo, solver=None):
+    archivo = os.path.abspath(archivo)
+    version = os.stat(archivo).st_mtime_ns
+    if (archivo, None) not in _modelos or _modelos[(archivo, None)][0] != version:
+        for llave in [llave for llave in _modelos if llave[0] == archivo]:
+            del _modelos[llave]
+        _modelos[(archivo, None)] = (version, _leer(archivo))
+    if (archivo, solver) not in _modelos:
+        modelo = _modelos[(archivo, None)][1].copy()
+        modelo.solver = solver
+        _modelos[(archivo, solver)] = (version, modelo)
+    return _modelos[(archivo, solver)][1]
+
+
+def cargar_modelo(archivo, solver=None):
+    """Copia del modelo de `archivo` (JSON) con ATPM, usando `solver` si se entrega.
+
+    Solo la primera llamada del proceso lee el archivo (o su caché
+    binario); las siguientes copian el modelo que queda en memoria. Si el
+    JSON cambia, se vuelve a leer.
+    """
+    return _maestro(archivo, solver).copy()
+
+
+@contextmanager
+def prestar_modelo(archivo, solver=None):
+    """El modelo de `archivo` compartido por el proceso, dentro de `with modelo:`.
+
+    Sirve para trabajo que se deshace con el contexto de cobra (cortes,
+    cotas, objetivo, reacciones y restricciones agregadas): cuesta
+    milisegundos en vez de una copia. Lo que no registra el contexto (por
+    ejemplo cambiar a mano la cota de una restricción) queda en el modelo.
+    """
+    modelo = _maestro(archivo, solver)
+    with modelo:
+        yield modelo
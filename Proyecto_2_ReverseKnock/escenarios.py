@@ -0,0 +1,93 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import product
+
+import pandas as pd
+
+from carga import cargar_modelo
+from optknock import construir_optknock, tier_list
+from preproceso import comprimir_red, cotas_fva
+
+# Corre OptKnock sobre una grilla de escenarios (objetivo, K, f) en varios
+# procesos. Cada proceso carga el modelo base una sola vez (en el
+# inicializador del pool, desde el caché de carga.py) y por escenario solo
+# lo copia.
+_trabajador = {}
+
+
+def grilla(objetivos, lista_K, lista_f):
+    """Todas las combinaciones de objetivos (tupla de reacciones), K y f."""
+    return [{"objetivos": tuple(obj), "K": K, "f": f} for obj, K, f in product(objetivos, lista_K, lista_f)]
+
+
+def _iniciar(archivo_modelo, solver, hilos):
+    _trabajador.update(modelo=cargar_modelo(archivo_modelo, solver), hilos=hilos)
+
+
+def _correr(escenario, biomasa, iteraciones, comprimir, limite_tiempo, opciones):
+    inicio = time.perf_counter()
+    modelo = _trabajador["modelo"].copy()
+    # Un proceso por escenario: el solver no debe tomar todos los núcleos
+    if hasattr(modelo.solver.configuration, "threads"):
+        modelo.solver.configuration.threads = _trabajador["hilos"]
+    if limite_tiempo is not None:
+        modelo.solver.configuration.timeout = limite_tiempo
+
+    grupos = None
+    argumentos = dict(opciones, biomasa=biomasa, objetivos=escenario["objetivos"], K=escenario["K"], f=escenario["f"])
+    if comprimir:
+        red = comprimir_red(modelo, biomasa=biomasa, objetivos=escenario["objetivos"], f=escenario["f"], processes=1)
+        grupos = red["grupos"]
+        argumentos.update(candidatos=red["candidatos"],
+                          cotas=cotas_fva(modelo, red["candidatos"], processes=1))
+    problema = construir_optknock(modelo, **argumentos)
+    df = tier_list(problema, iteraciones=iteraciones, grupos=grupos)
+    if df.empty:
+        # El escenario queda en la tabla aunque no tenga solución
+        df = pd.DataFrame([{"Iteracion": None, "Objetivo": None, "Biomasa": None, "Genes": ""}])
+
+    df.insert(0, "Objetivos", ", ".join(escenario["objetivos"]))
+    df.insert(1, "K", escenario["K"])
+    df.insert(2, "f", escenario["f"])
+    df["Segundos"] = time.perf_counter() - inicio
+    return df
+
+
+def correr_escenarios(archivo_modelo, escenarios, n_jobs=None, hilos=1, biomasa="ATPM", iteraciones=1, comprimir=True,
+                      limite_tiempo=None, solver=None, archivo=None, **opciones):
+    """Resuelve OptKnock (o una tier list de `iteraciones`) para cada escenario.
+
+    `escenarios` es una lista de diccionarios con objetivos, K y f (ver
+    `grilla`). Los escenarios se reparten en `n_jobs` procesos (todos los
+    núcleos por defecto) y cada solver usa `hilos` hilos. Las demás opciones
+    (M, M_dual, holgura, ...) pasan a `construir_optknock`.
+
+    Retorna una sola tabla con todos los escenarios; con `archivo` además la
+    guarda como CSV.
+    """
+    escenarios = list(escenarios)
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = max(1, os.cpu_count() // hilos)
+    n_jobs = max(1, min(n_jobs, len(escenarios)))
+
+    tarea = partial(_correr, biomasa=biomasa, iteraciones=iteraciones, comprimir=comprimir, limite_tiempo=limite_tiempo,
+                    opciones=opciones)
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_iniciar,
+                             initargs=(archivo_modelo, solver, hilos)) as pool:
+        tablas = list(pool.map(tarea, escenarios))
+
+    resultados = pd.concat(tablas, ignore_index=True) if tablas else pd.DataFrame()
+    if archivo is not None:
+        resultados.to_csv(archivo, index=False)
+    return resultados
+
+
+if __name__ == "__main__":
+    # Lactato y prostaglandina D2 con distintos presupuestos de cortes y crecimiento mínimo
+    escenarios = grilla([("LDH_L", "EX_lac_L_LPAREN_e_RPAREN_"), ("EX_prostgd2_LPAREN_e_RPAREN_",)],
+                        [3, 5, 8], [0.05, 0.1, 0.2])
+    df = correr_escenarios("macrofago_limpio.json", escenarios, hilos=2, solver="gurobi", limite_tiempo=3600,
+                           archivo="escenarios_optknock.csv")
+    print(df)
@@ -0,0 +1,109 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+
+from validacion import evaluar_cortes, modelo_glpk
+
+# Soluciones iniciales para el MILP de OptKnock. Se buscan conjuntos de
+# cortes sobre los mismos candidatos, evaluando cada uno con FBA en la red
+# sin el MILP: crecimiento máximo y, a ese crecimiento, el mínimo flujo del
+# objetivo (lo mismo que mide el MILP). Los mejores se pasan al solver como
+# MIP starts (`sembrar`), así parte con un incumbente desde el inicio.
+_trabajador = {}
+
+
+def _iniciar(modelo, biomasa, objetivos):
+    _trabajador.update(modelo=modelo, biomasa=biomasa, objetivos=objetivos)
+
+
+def _evaluar(cortes):
+    return evaluar_cortes(_trabajador["modelo"], cortes, _trabajador["biomasa"], _trabajador["objetivos"],
+                          sentidos=("min",))
+
+
+def buscar_arranques(modelo, candidatos, biomasa="ATPM", objetivos=("LDH_L", "EX_lac_L_LPAREN_e_RPAREN_"), K=5, f=0.1,
+                     n=5, reserva=20, ancho=3, generaciones=10, poblacion=30, n_jobs=1, semilla=0):
+    """Busca conjuntos de hasta `K` cortes entre `candidatos` con FBA, sin resolver el MILP.
+
+    `modelo` es la red sin el MILP (una copia tomada antes de
+    `construir_optknock`). Un conjunto sirve si deja crecimiento >= `f`; entre
+    esos gana el de menor flujo objetivo a crecimiento óptimo, luego el de
+    mayor crecimiento y luego el de menos cortes.
+
+    1. Cortes simples de todos los candidatos; los `reserva` mejores quedan
+       como reserva.
+    2. Todos los pares de la reserva y, desde los `ancho` mejores, se agrega
+       de a un corte de la reserva hasta llegar a `K` (búsqueda en haz).
+    3. `generaciones` rondas evolutivas sobre una población de `poblacion`
+       conjuntos: cruce de dos padres y mutación (cambiar, agregar o sacar
+       un corte con cualquier candidato).
+
+    Con `n_jobs` > 1 (None o negativo: todos los núcleos) las evaluaciones
+    de cada paso se reparten en procesos; cada uno recibe una copia del
+    modelo con GLPK. Por defecto todo corre en este proceso: con pocos
+    candidatos los procesos cuestan más de lo que ahorran. Retorna los `n`
+    mejores conjuntos distintos, como lista de diccionarios (cortes,
+    objetivo, biomasa), para `sembrar`.
+    """
+    azar = random.Random(semilla)
+    candidatos = list(candidatos)
+    evaluados = {}
+
+    def puntaje(conjunto):
+        crecimiento, objetivo = evaluados[conjunto]
+        if np.isnan(objetivo) or crecimiento < f:
+            return (1, 0, 0, 0)
+        return (0, round(objetivo, 6), -round(crecimiento, 6), len(conjunto))
+
+    def evaluar(conjuntos):
+        nuevos = list({c for c in conjuntos if c not in evaluados and 0 < len(c) <= K})
+        tareas = [sorted(c) for c in nuevos]
+        if pool is None:
+            resultados = [_evaluar(cortes) for cortes in tareas]
+        else:
+            resultados = pool.map(_evaluar, tareas, chunksize=max(1, len(tareas) // (4 * n_jobs)))
+        evaluados.update(zip(nuevos, resultados))
+        return sorted({c for c in conjuntos if c in evaluados}, key=puntaje)
+
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count()
+    pool = None
+    if n_jobs > 1:
+        pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=_iniciar,
+                                   initargs=(modelo_glpk(modelo), biomasa, objetivos))
+    else:
+        _iniciar(modelo, biomasa, objetivos)
+
+    try:
+        simples = evaluar([frozenset([rid]) for rid in candidatos])
+        reserva = [next(iter(c)) for c in simples if puntaje(c)[0] == 0][:reserva]
+
+        haz = evaluar([frozenset(par) for par in combinations(reserva, 2)] + simples[:ancho])[:ancho]
+        mejores = list(haz)
+        for _ in range(2, K):
+            haz = evaluar([c | {rid} for c in haz for rid in reserva if rid not in c])[:ancho]
+            mejores.extend(haz)
+
+        familia = evaluar(mejores + simples[:poblacion])[:poblacion]
+        for _ in range(generaciones if len(familia) > 1 else 0):
+            hijos = []
+            for _ in range(poblacion):
+                padre, madre = azar.sample(familia, 2)
+                union = sorted(padre | madre)
+                hijo = set(azar.sample(union, min(len(union), azar.randint(1, K))))
+                movida = azar.random()
+                if movida < 0.4 and len(hijo) > 1:
+                    hijo.remove(azar.choice(sorted(hijo)))
+                if movida > 0.3 and len(hijo) < K:
+                    hijo.add(azar.choice(candidatos))
+                hijos.append(frozenset(hijo))
+            familia = evaluar(familia + hijos)[:poblacion]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    finales = [c for c in sorted(evaluados, key=puntaje) if puntaje(c)[0] == 0][:n]
+    return [{"cortes": sorted(c), "objetivo": evaluados[c][1], "biomasa": evaluados[c][0]} for c in finales]
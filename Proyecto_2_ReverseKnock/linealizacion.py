@@ -0,0 +1,108 @@
+from optlang.symbolics import Zero
+
+# Capa de formulación para los MILP de OptKnock. La dualidad fuerte queda
+# con productos binaria * continua (mu * y); con la linealización de
+# McCormick cada producto pasa a ser una variable z con filas lineales y
+# el problema es un MILP que resuelve cualquier solver, sin NonConvex.
+
+
+def agregar_filas(modelo, filas):
+    # filas: lista de (nombre, lb, ub, {variable: coeficiente}). Las
+    # restricciones se crean vacías, se agregan todas juntas y recién ahí se
+    # cargan sus coeficientes directo en el solver, sin armar expresiones
+    # simbólicas (sumar términos con sympy es lo que hacía lento el armado).
+    prob = modelo.problem
+    restricciones = [prob.Constraint(Zero, lb=lb, ub=ub, name=nombre) for nombre, lb, ub, _ in filas]
+    modelo.add_cons_vars(restricciones)
+    modelo.solver.update()
+    for cons, (_, _, _, coeficientes) in zip(restricciones, filas):
+        cons.set_linear_coefficients(coeficientes)
+    return restricciones
+
+
+def _sin_ceros(coeficientes):
+    return {var: coef for var, coef in coeficientes.items() if coef != 0}
+
+
+def mccormick(modelo, binaria, continua, nombre):
+    """Variable z = binaria * continua y sus filas (aún no agregadas al modelo).
+
+    Con y binaria y L <= x <= U (las cotas de la variable continua) las
+    filas z <= U y, z >= L y, z <= x - L (1 - y) y z >= x - U (1 - y) son
+    exactas: y = 0 da z = 0 e y = 1 da z = x. La fila z >= L y se omite
+    cuando L = 0, porque ya la da la cota inferior de z.
+    """
+    L, U = continua.lb, continua.ub
+    if L is None or U is None:
+        raise ValueError(f"{continua.name} necesita cotas finitas para linealizar {nombre}.")
+    z = modelo.problem.Variable(nombre, lb=min(L, 0), ub=max(U, 0))
+    filas = [
+        (nombre + "_1", None, 0, _sin_ceros({z: 1, binaria: -U})),
+        (nombre + "_2", None, -L, _sin_ceros({z: 1, continua: -1, binaria: -L})),
+        (nombre + "_3", None, U, _sin_ceros({continua: 1, z: -1, binaria: U})),
+    ]
+    if L != 0:
+        filas.append((nombre + "_4", None, 0, {binaria: L, z: -1}))
+    return z, filas
+
+
+def linealizar(modelo, expresion, prefijo="z_"):
+    """Reemplaza en `expresion` cada producto binaria * continua por una variable de `mccormick`.
+
+    Los términos pueden ser constantes, lineales, productos de dos variables
+    con al menos una binaria (y * y queda como y) y cualquier coeficiente
+    numérico. Un producto de dos continuas no tiene linealización exacta y
+    levanta ValueError.
+
+    Retorna (coeficientes, constante, variables nuevas, filas nuevas), listo
+    para `agregar_filas`.
+    """
+    coeficientes = {}
+    constante = 0.0
+    nuevas = {}
+    filas = []
+    expresion = expresion.expand()
+    for termino in expresion.args if expresion.is_Add else (expresion,):
+        coef = 1.0
+        factores = []
+        for factor in termino.args if termino.is_Mul else (termino,):
+            if factor.is_Number:
+                coef *= float(factor)
+            elif factor.is_Symbol:
+                factores.append(modelo.variables[factor.name])
+            elif factor.is_Pow and factor.args[0].is_Symbol and modelo.variables[factor.args[0].name].type == "binary":
+                factores.append(modelo.variables[factor.args[0].name])
+            else:
+                raise ValueError(f"Término no lineal que no se puede linealizar: {termino}")
+        if len(factores) == 2 and factores[0] is factores[1] and factores[0].type == "binary":
+            factores = factores[:1]
+
+        if not factores:
+            constante += coef
+            continue
+        if len(factores) == 1:
+            variable = factores[0]
+        elif len(factores) == 2:
+            binarias = [v for v in factores if v.type == "binary"]
+            if not binarias:
+                raise ValueError(f"Producto de dos continuas, no tiene linealización exacta: {termino}")
+            y = binarias[0]
+            x = factores[1] if factores[0] is y else factores[0]
+            if (y.name, x.name) not in nuevas:
+                z, filas_z = mccormick(modelo, y, x, f"{prefijo}{x.name}_{y.name}")
+                nuevas[(y.name, x.name)] = z
+                filas.extend(filas_z)
+            variable = nuevas[(y.name, x.name)]
+        else:
+            raise ValueError(f"Término de grado mayor a 2: {termino}")
+        coeficientes[variable] = coeficientes.get(variable, 0) + coef
+    return coeficientes, constante, list(nuevas.values()), filas
+
+
+def agregar_restriccion(modelo, expresion, lb=None, ub=None, nombre=None):
+    """Agrega lb <= expresion <= ub al modelo, linealizando los productos con binarias."""
+    coeficientes, constante, variables, filas = linealizar(modelo, expresion)
+    modelo.add_cons_vars(variables)
+    filas.append((nombre, None if lb is None else lb - constante, None if ub is None else ub - constante,
+                  coeficientes))
+    return agregar_filas(modelo, filas)[-1]
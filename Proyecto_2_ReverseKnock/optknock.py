@@ -0,0 +1,448 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from cobra.util.array import create_stoichiometric_matrix
+from optlang.symbolics import Zero
+
+from linealizacion import agregar_filas
+from telemetria import registrar_progreso
+
+# Motor de OptKnock para la tier list: el MILP (binarias, duales, Big-M y
+# linealización de la dualidad fuerte) se arma una sola vez y entre
+# iteraciones solo se prohíben los cortes anteriores, en vez de volver a
+# cargar el modelo y reconstruir todo como en tierlist.py.
+
+
+def _flujo(r, coef=1):
+    # v = v_forward - v_reverse
+    return {r.forward_variable: coef, r.reverse_variable: -coef}
+
+
+def construir_optknock(modelo, biomasa="ATPM", objetivos=("LDH_L", "EX_lac_L_LPAREN_e_RPAREN_"), K=5, f=0.1, M=3000,
+                       M_dual=10000, coef_inc=0.0001, holgura=0.1, candidatos=None, cotas=None):
+    """Arma sobre `modelo` (se modifica) el MILP bi-nivel de tierlist.py.
+
+    Se minimiza la suma de los flujos de `objetivos` sujeto a que `biomasa`
+    sea óptima en el problema interno (dualidad fuerte con margen `holgura`)
+    y sea al menos `f`, cortando a lo más `K` reacciones. y_j = 0 significa
+    que la reacción j se corta. `candidatos` restringe las reacciones que
+    se pueden cortar (por ejemplo las que deja `preproceso.comprimir_red`):
+    las que quedan fuera se arman como una cortable con y_j = 1 fijo (sin
+    cotas en el problema interno, mu = 0), así que el MILP es el completo
+    con esos cortes prohibidos y no uno más relajado.
+    `cotas` ({reacción: (mínimo, máximo)}, ver `preproceso.cotas_fva`)
+    reemplaza la constante M de las filas Big-M por el rango de flujo de
+    cada reacción, lo que ajusta bastante la relajación lineal. Las cotas de
+    los duales siguen siendo globales (lambda y mu en [-M_dual, M_dual] y
+    mu <= M(1 - y)): FVA acota flujos, no precios sombra, y no hay una cota
+    por reacción que valga en general.
+
+    Los bloques se arman en forma matricial: las filas duales salen de las
+    columnas de la matriz estequiométrica dispersa y todas las filas se
+    cargan en el solver con `set_linear_coefficients`.
+
+    Retorna un diccionario con el modelo, las binarias y las restricciones
+    que `prohibir` relaja para sacar una reacción de los candidatos.
+    """
+    prob = modelo.problem
+    biomasa_rxn = modelo.reactions.get_by_id(biomasa)
+    objetivos = [modelo.reactions.get_by_id(rid) for rid in objetivos]
+    reacciones = list(modelo.reactions)
+
+    # Reacciones que se pueden cortar. Las que `candidatos` deja fuera
+    # (libres) quedan como una cortable que nunca se corta: sin binaria ni
+    # Big-M y con mu = 0, es decir, sin sus duales de cota
+    validos = [r for r in reacciones if r != biomasa_rxn and r not in objetivos and "EX_" not in r.id]
+    libres = set()
+    if candidatos is not None:
+        candidatos = set(candidatos)
+        libres = {r.id for r in validos if r.id not in candidatos}
+        validos = [r for r in validos if r.id in candidatos]
+
+    # Cotas de cada reacción en la dualidad fuerte
+    val_up = {r.id: min(r.upper_bound, M) for r in reacciones}
+    val_lb = {r.id: max(r.lower_bound, -M) for r in reacciones}
+
+    # Duales de cota que pueden ser distintos de cero. En las cortables mu
+    # solo vive con la reacción cortada (mu <= M(1 - y)), así que el producto
+    # mu * y de la dualidad fuerte es siempre 0: no llevan z ni filas de
+    # linealización. En las demás una cota en 0 no suma nada a la dualidad
+    # fuerte y su dual es solo una holgura de la fila dual, que pasa a ser un
+    # rango. Las cotas que FVA muestra inactivas no sirven para podar: en el
+    # problema interno que certifica la dualidad las cortables activas no
+    # tienen cotas (mu = 0), así que otras cotas sí se pueden alcanzar.
+    cotas = {} if cotas is None else cotas
+    cortables = {r.id for r in validos}
+    con_ub = {r.id for r in reacciones if r.id not in libres and (r.id in cortables or val_up[r.id] != 0)}
+    con_lb = {r.id for r in reacciones if r.id not in libres and (r.id in cortables or val_lb[r.id] != 0)}
+
+    # Variables: binarias y duales
+    y_vars = {r.id: prob.Variable('y_' + r.id, type='binary') for r in validos}
+    dual_lambda = [prob.Variable('lambda'+met.id, lb=-M_dual, ub=M_dual) for met in modelo.metabolites]
+    dual_mu_ub = {r.id: prob.Variable('mu_ub'+r.id, lb=0, ub=M_dual) for r in reacciones if r.id in con_ub}
+    dual_mu_lb = {r.id: prob.Variable('mu_lb'+r.id, lb=0, ub=M_dual) for r in reacciones if r.id in con_lb}
+    modelo.add_cons_vars([*y_vars.values(), *dual_lambda, *dual_mu_lb.values(), *dual_mu_ub.values()])
+
+    filas = []
+    # Restricciones Primales Big-M: v - M y <= 0 y -v - M y <= 0. Con cotas
+    # de FVA, M es el mayor flujo que la reacción puede llevar en cada sentido
+    # (cortar reacciones solo achica ese rango, así que la cota sigue valiendo).
+    for r in validos:
+        y = y_vars[r.id]
+        M_up, M_low = (M, M) if r.id not in cotas else (max(cotas[r.id][1], 0), max(-cotas[r.id][0], 0))
+        filas.append(('Big_M_Up'+r.id, None, 0, {**_flujo(r), y: -M_up}))
+        if r.lower_bound < 0:
+            filas.append(('Big_M_low'+r.id, None, 0, {**_flujo(r, -1), y: -M_low}))
+    # sum(1 - y) <= K
+    filas.append(('Max_Knockouts', None, K - len(validos), {y: -1 for y in y_vars.values()}))
+
+    # Restricciones de Igualdad Dual: S^T lambda + mu_ub - mu_lb = c, una
+    # fila por columna de S
+    S = create_stoichiometric_matrix(modelo, array_type="dok").tocsc()
+    for j, r in enumerate(reacciones):
+        c_j = 0
+        if r == biomasa_rxn:
+            c_j = 1
+        elif r in objetivos:
+            c_j = coef_inc
+        coeficientes = {dual_lambda[i]: valor for i, valor in
+                        zip(S.indices[S.indptr[j]:S.indptr[j + 1]], S.data[S.indptr[j]:S.indptr[j + 1]])}
+        lb, ub = c_j, c_j
+        if r.id in dual_mu_ub:
+            coeficientes[dual_mu_ub[r.id]] = 1
+        elif val_up[r.id] == 0 and r.id not in libres:
+            lb -= M_dual
+        if r.id in dual_mu_lb:
+            coeficientes[dual_mu_lb[r.id]] = -1
+        elif val_lb[r.id] == 0 and r.id not in libres:
+            ub += M_dual
+        filas.append(("EcuDual"+r.id, lb, ub, coeficientes))
+
+    # mu <= M * (1 - y)  ->  mu + M y <= M
+    for r in validos:
+        y = y_vars[r.id]
+        filas.append(('Dual_810_' + r.id, None, M, {dual_mu_ub[r.id]: 1, y: M}))
+        filas.append(('Dual_811_' + r.id, None, M, {dual_mu_lb[r.id]: 1, y: M}))
+
+    # Dualidad Fuerte: v_biom + coef_inc * target = sum(mu_ub ub - mu_lb lb),
+    # solo con las reacciones que no se pueden cortar (ver arriba)
+    fuerte = _flujo(biomasa_rxn)
+    for r in objetivos:
+        fuerte.update(_flujo(r, coef_inc))
+    for r in reacciones:
+        if r.id in y_vars:
+            continue
+        if r.id in dual_mu_ub and val_up[r.id] != 0:
+            fuerte[dual_mu_ub[r.id]] = -val_up[r.id]
+        if r.id in dual_mu_lb and val_lb[r.id] != 0:
+            fuerte[dual_mu_lb[r.id]] = val_lb[r.id]
+    filas.append(("DualidadFuerte", -holgura, holgura, fuerte))
+    # Supervivencia
+    filas.append(("MinimaBiomasa", f, None, _flujo(biomasa_rxn)))
+
+    restricciones = dict(zip((fila[0] for fila in filas), agregar_filas(modelo, filas)))
+
+    # Términos de la dualidad fuerte que `prohibir` agrega al sacar una cortable
+    terminos = {r.id: {dual_mu_ub[r.id]: -val_up[r.id], dual_mu_lb[r.id]: val_lb[r.id]} for r in validos}
+
+    # Filas que se relajan al prohibir una reacción
+    relajables = {r.id: [restricciones[nombre] for nombre in ('Big_M_Up'+r.id, 'Big_M_low'+r.id, 'Dual_810_' + r.id,
+                                                              'Dual_811_' + r.id) if nombre in restricciones]
+                  for r in validos}
+
+    # Objetivo: Minimizar el target
+    modelo.objective = prob.Objective(Zero, direction='min')
+    coeficientes = {}
+    for r in objetivos:
+        coeficientes.update(_flujo(r))
+    modelo.objective.set_linear_coefficients(coeficientes)
+
+    return {
+        "modelo": modelo,
+        "biomasa": biomasa_rxn,
+        "y": y_vars,
+        "relajables": relajables,
+        "fuerte": restricciones["DualidadFuerte"],
+        "terminos": terminos,
+        "prohibidos": [],
+        "incumbente": None,
+        "arranques": [],
+        # Lo que define el MILP, para no retomar un checkpoint de otro problema
+        "parametros": {"biomasa": biomasa, "objetivos": [r.id for r in objetivos], "K": K, "f": f, "M": M,
+                       "M_dual": M_dual, "coef_inc": coef_inc, "holgura": holgura,
+                       "candidatos": sorted(y_vars), "cotas_fva": bool(cotas)},
+    }
+
+
+def prohibir(problema, reacciones):
+    # Saca las reacciones de los candidatos sin reconstruir el MILP: y queda
+    # fija en 1, se relajan sus filas Big-M y mu <= M(1 - y) y sus duales
+    # entran a la dualidad fuerte, así que la reacción queda con sus cotas
+    # como las que no se pueden cortar (lo que hacía tierlist.py al sacarla
+    # de `validos`).
+    for rid in reacciones:
+        if rid not in problema["y"] or rid in problema["prohibidos"]:
+            continue
+        problema["y"][rid].lb = 1
+        for cons in problema["relajables"][rid]:
+            cons.ub = None
+        problema["fuerte"].set_linear_coefficients(problema["terminos"][rid])
+        problema["prohibidos"].append(rid)
+
+
+def _arranque_mip(modelo, arranques):
+    # Soluciones iniciales parciales (nombre de variable -> valor). optlang no
+    # las expone, así que se pasan directo al solver; con GLPK no hace nada.
+    interfaz = modelo.solver.interface.__name__
+    if interfaz == "optlang.gurobi_interface":
+        problema = modelo.solver.problem
+        problema.NumStart = len(arranques)
+        for i, valores in enumerate(arranques):
+            problema.Params.StartNumber = i
+            for nombre, valor in valores.items():
+                problema.getVarByName(nombre).Start = valor
+        problema.update()
+    elif interfaz == "optlang.cplex_interface":
+        for valores in arranques:
+            nombres = list(valores)
+            modelo.solver.problem.MIP_starts.add([nombres, [float(valores[n]) for n in nombres]],
+                                                 modelo.solver.problem.MIP_starts.effort_level.repair)
+
+
+def sembrar(problema, estrategias):
+    """Guarda conjuntos de cortes (de `heuristicas.buscar_arranques`) como MIP starts.
+
+    Se pasan al solver en cada `resolver_optknock`, salvo los que cortan
+    reacciones ya prohibidas. Los cortes que no son candidatos se ignoran.
+    """
+    for estrategia in estrategias:
+        cortes = set(estrategia["cortes"])
+        if cortes <= set(problema["y"]):
+            problema["arranques"].append({y.name: 0 if rid in cortes else 1 for rid, y in problema["y"].items()})
+
+
+def resolver_optknock(problema, telemetria=None):
+    """Resuelve el MILP y retorna (cortes, flujo objetivo, flujo de biomasa).
+
+    Si hay un incumbente de la iteración anterior se usa como solución
+    inicial, con las reacciones ya prohibidas activas, junto con las
+    soluciones de `sembrar` que siguen siendo factibles. Con `telemetria` (una
+    lista) se le agrega el progreso del solver: ver
+    `telemetria.registrar_progreso`.
+    """
+    modelo = problema["modelo"]
+    arranques = []
+    if problema["incumbente"] is not None:
+        inicio = dict(problema["incumbente"])
+        inicio.update((problema["y"][rid].name, 1) for rid in problema["prohibidos"])
+        arranques.append(inicio)
+    prohibidos = [problema["y"][rid].name for rid in problema["prohibidos"]]
+    arranques.extend(a for a in problema["arranques"] if all(a[nombre] == 1 for nombre in prohibidos))
+    if arranques:
+        _arranque_mip(modelo, arranques)
+
+    if telemetria is None:
+        solution = modelo.optimize()
+    else:
+        with registrar_progreso(modelo) as progreso:
+            solution = modelo.optimize()
+        telemetria.extend(progreso)
+    if solution.status != 'optimal':
+        return [], None, None
+
+    problema["incumbente"] = {y.name: round(y.primal) for y in problema["y"].values()}
+    cortes = [r_id for r_id, y in problema["y"].items() if y.primal < 0.1]
+    return cortes, solution.objective_value, problema["biomasa"].flux
+
+
+def _guardar_checkpoint(archivo, problema, filas, terminado):
+    # Se escribe a un archivo temporal y se reemplaza: si el proceso muere a
+    # medio escribir, el checkpoint anterior sigue intacto
+    with open(archivo + ".tmp", "w") as f:
+        json.dump({"parametros": problema["parametros"], "filas": filas, "prohibidos": problema["prohibidos"],
+                   "incumbente": problema["incumbente"], "terminado": terminado}, f, indent=1)
+    os.replace(archivo + ".tmp", archivo)
+
+
+def _retomar_checkpoint(archivo, problema):
+    with open(archivo) as f:
+        guardado = json.load(f)
+    if guardado["parametros"] != problema["parametros"]:
+        raise ValueError(f"El checkpoint {archivo} es de otro problema (parámetros distintos).")
+    prohibir(problema, guardado["prohibidos"])
+    problema["incumbente"] = guardado["incumbente"]
+    return guardado["filas"], guardado["terminado"]
+
+
+def tier_list(problema, iteraciones=5, grupos=None, checkpoint=None, telemetria=None):
+    """Repite OptKnock prohibiendo en cada iteración los cortes ya encontrados.
+
+    Retorna un DataFrame con una fila por iteración (Iteracion, Objetivo,
+    Biomasa, Genes). Con `grupos` (de `preproceso.comprimir_red`) se agrega la
+    columna Acopladas con todas las reacciones originales que apaga cada corte.
+
+    Con `checkpoint` (ruta de un JSON) se guardan después de cada iteración
+    las filas, los cortes prohibidos, el incumbente y los parámetros del
+    MILP. Si el archivo ya existe la tier list sigue desde la última
+    iteración terminada y parte desde el incumbente guardado.
+
+    Con `telemetria` (ruta de un CSV) se guarda el progreso del solver en
+    cada iteración (incumbente, cota, gap, nodos y segundos), para ver dónde
+    se estanca y ajustar los límites de tiempo.
+    """
+    filas = []
+    terminado = False
+    if checkpoint is not None and os.path.exists(checkpoint):
+        filas, terminado = _retomar_checkpoint(checkpoint, problema)
+        print(f"Retomando desde la iteración {len(filas) + 1}")
+    progreso = []
+    if telemetria is not None and filas and os.path.exists(telemetria):
+        progreso = pd.read_csv(telemetria).to_dict("records")
+
+    for i in range(len(filas), 0 if terminado else iteraciones):
+        print("Iteración " + str(i + 1))
+        registros = None if telemetria is None else []
+        cortes, t_flux, b_flux = resolver_optknock(problema, telemetria=registros)
+        if telemetria is not None:
+            progreso.extend(dict(registro, Iteracion=i + 1) for registro in registros)
+            pd.DataFrame(progreso, columns=["Iteracion", "Segundos", "Incumbente", "Cota", "Gap", "Nodos"]).to_csv(
+                telemetria, index=False)
+        if not cortes:
+            print("No se encontraron más soluciones óptimas.")
+            if checkpoint is not None:
+                _guardar_checkpoint(checkpoint, problema, filas, True)
+            break
+
+        print(f"Cortes encontrados: {cortes}")
+        fila = _fila_estrategia(i + 1, t_flux, b_flux, cortes, grupos)
+        filas.append({"Iteracion": fila.pop("Rango"), **fila})
+        # Los cortes quedan prohibidos en la siguiente iteración
+        prohibir(problema, cortes)
+        if checkpoint is not None:
+            _guardar_checkpoint(checkpoint, problema, filas, False)
+    columnas = ["Iteracion", "Objetivo", "Biomasa", "Genes"] + ([] if grupos is None else ["Acopladas"])
+    return pd.DataFrame(filas, columns=columnas)
+
+
+def _fila_estrategia(rango, objetivo, biomasa, cortes, grupos):
+    fila = {"Rango": rango, "Objetivo": objetivo, "Biomasa": biomasa, "Genes": ", ".join(cortes)}
+    if grupos is not None:
+        fila["Acopladas"] = ", ".join(rid for corte in cortes for rid in grupos.get(corte, [corte]))
+    return fila
+
+
+def _pool_gurobi(problema, n):
+    # Pool de soluciones de Gurobi: PoolSearchMode=2 busca en forma
+    # sistemática las n mejores, distintas en las variables enteras (las y)
+    grb = problema["modelo"].solver.problem
+    anteriores = (grb.Params.PoolSearchMode, grb.Params.PoolSolutions)
+    grb.Params.PoolSearchMode, grb.Params.PoolSolutions = 2, n
+    try:
+        problema["modelo"].slim_optimize()
+        biomasa = problema["biomasa"]
+        v_ida, v_vuelta = (grb.getVarByName(var.name) for var in (biomasa.forward_variable, biomasa.reverse_variable))
+        y_grb = {rid: grb.getVarByName(y.name) for rid, y in problema["y"].items()}
+        soluciones = []
+        for k in range(grb.SolCount):
+            grb.Params.SolutionNumber = k
+            cortes = [rid for rid, y in y_grb.items() if y.Xn < 0.1]
+            soluciones.append((grb.PoolObjVal, v_ida.Xn - v_vuelta.Xn, cortes))
+        return soluciones
+    finally:
+        grb.Params.PoolSearchMode, grb.Params.PoolSolutions = anteriores
+
+
+def _cortes_no_good(problema, n):
+    # Respaldo para cualquier solver: después de cada solución se agrega un
+    # corte que excluye exactamente ese vector de y,
+    #   sum_{j cortada} y_j + sum_{j activa} (1 - y_j) >= 1,
+    # y se vuelve a resolver el mismo modelo. Los cortes se sacan al final.
+    modelo = problema["modelo"]
+    soluciones = []
+    cortes_agregados = []
+    try:
+        while len(soluciones) < n:
+            cortes, objetivo, biomasa = resolver_optknock(problema)
+            if objetivo is None:
+                break
+            soluciones.append((objetivo, biomasa, cortes))
+            cortados = set(cortes)
+            coeficientes = {y: (1 if rid in cortados else -1) for rid, y in problema["y"].items()}
+            activas = len(problema["y"]) - len(cortados)
+            cortes_agregados += agregar_filas(modelo, [(f"NoGood_{len(soluciones)}", 1 - activas, None, coeficientes)])
+            # El incumbente es justo lo que el corte excluye: como solución
+            # inicial sería infactible
+            problema["incumbente"] = None
+    finally:
+        modelo.remove_cons_vars(cortes_agregados)
+    return soluciones
+
+
+def mejores_estrategias(problema, n=10, grupos=None):
+    """Las `n` mejores estrategias de corte distintas, con una sola optimización.
+
+    Con Gurobi se usa su pool de soluciones; con otros solvers se agregan
+    cortes no-good sobre el mismo modelo y se re-resuelve. Retorna un DataFrame ordenado por el flujo
+    objetivo con Rango, Objetivo, Biomasa y Genes (y Acopladas si se
+    entregan los `grupos` de `preproceso.comprimir_red`).
+    """
+    if problema["modelo"].solver.interface.__name__ == "optlang.gurobi_interface":
+        soluciones = _pool_gurobi(problema, n)
+    else:
+        soluciones = _cortes_no_good(problema, n)
+
+    soluciones.sort(key=lambda sol: sol[0])
+    filas = [_fila_estrategia(k + 1, objetivo, biomasa, cortes, grupos)
+             for k, (objetivo, biomasa, cortes) in enumerate(soluciones)]
+    columnas = ["Rango", "Objetivo", "Biomasa", "Genes"] + ([] if grupos is None else ["Acopladas"])
+    return pd.DataFrame(filas, columns=columnas)
+
+
+def frente_pareto(problema, puntos=10, epsilons=None, grupos=None):
+    """Frente de Pareto crecimiento vs. flujo objetivo con el método epsilon-restricción.
+
+    Se resuelve el mismo MILP moviendo la cota de MinimaBiomasa por
+    `epsilons` (por defecto `puntos` valores entre el mayor crecimiento
+    posible y el `f` con que se armó). Se recorre de mayor a menor: la
+    solución de un paso sigue siendo factible en el siguiente y sirve de
+    solución inicial. Los cortes ya prohibidos se respetan.
+
+    Retorna un DataFrame con los puntos no dominados (más crecimiento y menos
+    objetivo), ordenado por Biomasa: Epsilon, Biomasa, Objetivo, Genes (y
+    Acopladas con `grupos`).
+    """
+    modelo = problema["modelo"]
+    minima = modelo.constraints["MinimaBiomasa"]
+    f = minima.lb
+    columnas = ["Epsilon", "Biomasa", "Objetivo", "Genes"] + ([] if grupos is None else ["Acopladas"])
+    if epsilons is None:
+        with modelo:
+            modelo.objective = modelo.problem.Objective(problema["biomasa"].flux_expression, direction="max")
+            maximo = modelo.slim_optimize(error_value=np.nan)
+        if np.isnan(maximo):
+            return pd.DataFrame(columns=columnas)
+        epsilons = np.linspace(maximo * (1 - 1e-6), f, puntos)
+
+    soluciones = []
+    try:
+        for eps in sorted(epsilons, reverse=True):
+            minima.lb = eps
+            print(f"Epsilon {eps:.4g}")
+            cortes, objetivo, biomasa = resolver_optknock(problema)
+            if objetivo is not None:
+                soluciones.append((eps, biomasa, objetivo, cortes))
+    finally:
+        minima.lb = f
+
+    # Un punto queda si ningún otro crece al menos lo mismo con menos objetivo
+    filas = []
+    mejor = np.inf
+    for eps, biomasa, objetivo, cortes in sorted(soluciones, key=lambda sol: (-sol[1], sol[2])):
+        if objetivo < mejor - 1e-9:
+            mejor = objetivo
+            fila = _fila_estrategia(None, objetivo, biomasa, cortes, grupos)
+            del fila["Rango"]
+            filas.append({"Epsilon": eps, **fila})
+    return pd.DataFrame(filas[::-1], columns=columnas)
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+from cobra.flux_analysis import flux_variability_analysis, single_reaction_deletion
+from cobra.util.array import create_stoichiometric_matrix
+from scipy.linalg import null_space
+
+# Preprocesamiento de la red antes de OptKnock: cada candidato que se saca
+# ahorra una binaria y hasta cuatro filas (Big-M y mu <= M(1 - y)) en el
+# MILP.
+
+
+def _grupos_acoplados(modelo, tol=1e-8):
+    # Dos reacciones están totalmente acopladas si sus filas en una base del
+    # espacio nulo de S son proporcionales: todo flujo con S v = 0 cumple
+    # v_i = k v_j, así que cortar una apaga a la otra. Una fila nula es una
+    # reacción bloqueada por la estequiometría, sin importar las cotas.
+    S = create_stoichiometric_matrix(modelo, array_type="dense")
+    N = null_space(S)
+    grupos = {}
+    bloqueadas = []
+    for j, r in enumerate(modelo.reactions):
+        fila = N[j]
+        norma = np.linalg.norm(fila)
+        if norma < tol:
+            bloqueadas.append(r.id)
+            continue
+        fila = fila / norma
+        fila = fila * np.sign(fila[np.flatnonzero(np.abs(fila) > tol)[0]])
+        grupos.setdefault(tuple(np.round(fila, 6)), []).append(r.id)
+    return list(grupos.values()), bloqueadas
+
+
+def comprimir_red(modelo, biomasa="ATPM", objetivos=("LDH_L", "EX_lac_L_LPAREN_e_RPAREN_"), f=0.1, processes=None):
+    """Reduce los candidatos a corte de OptKnock. No modifica `modelo`.
+
+    1. Descarta las reacciones bloqueadas por la estequiometría (ningún
+       flujo con S v = 0 las usa, con cualquier cota).
+    2. Junta las reacciones totalmente acopladas y deja una sola como
+       candidata; cortarla apaga al grupo completo.
+    3. Descarta los candidatos cuyo corte, por sí solo, deja la biomasa bajo
+       `f`: nunca pueden aparecer en una solución factible.
+
+    Las descartadas siguen en el modelo y `construir_optknock` las arma como
+    cortables que nunca se cortan (mu = 0), así que el MILP da el mismo
+    óptimo que sin comprimir. Las reacciones bloqueadas solo por sus cotas
+    (las de FVA) siguen siendo candidatas: en el problema interno del MILP
+    las cortables activas no tienen cotas, así que ahí sí pueden llevar
+    flujo y cortarlas puede cambiar la solución.
+
+    Retorna un diccionario con:
+      candidatos: ids para `construir_optknock(..., candidatos=...)`.
+      grupos: candidato -> reacciones originales que corta (él incluido).
+      bloqueadas, letales: ids descartados en los pasos 1 y 3.
+    """
+    protegidas = {biomasa, *objetivos}
+    acopladas, bloqueadas = _grupos_acoplados(modelo)
+    if protegidas & set(bloqueadas):
+        raise ValueError(f"La biomasa o los objetivos están bloqueados: {sorted(protegidas & set(bloqueadas))}")
+
+    # Mismo filtro que `validos` en los scripts
+    cortables = {r.id for r in modelo.reactions
+                 if r.id not in protegidas and "EX_" not in r.id and r.id not in bloqueadas}
+    grupos = {}
+    for grupo in acopladas:
+        miembros = [rid for rid in grupo if rid in cortables]
+        if miembros:
+            grupos[miembros[0]] = grupo
+    sueltas = cortables - {rid for grupo in grupos.values() for rid in grupo}
+    grupos.update((rid, [rid]) for rid in sorted(sueltas))
+
+    with modelo:
+        modelo.objective = biomasa
+        borrados = single_reaction_deletion(modelo, list(grupos), processes=processes)
+    crecimiento = {next(iter(ids)): valor for ids, valor in zip(borrados["ids"], borrados["growth"])}
+    letales = [rid for rid in grupos if not crecimiento[rid] >= f]
+
+    candidatos = [r.id for r in modelo.reactions if r.id in grupos and r.id not in letales]
+    return {
+        "candidatos": candidatos,
+        "grupos": {rid: grupos[rid] for rid in candidatos},
+        "bloqueadas": bloqueadas,
+        "letales": letales,
+    }
+
+
+def _huella(modelo):
+    # Hash de la estequiometría y las cotas: si cambia algo, cambia la llave
+    h = hashlib.sha256()
+    for r in modelo.reactions:
+        coeficientes = sorted((met.id, coef) for met, coef in r.metabolites.items())
+        h.update(repr((r.id, r.lower_bound, r.upper_bound, coeficientes)).encode())
+    return h.hexdigest()
+
+
+def cotas_fva(modelo, reacciones=None, archivo=None, processes=None):
+    """Rango de flujo (mínimo, máximo) de cada reacción según FVA, sin exigir optimalidad.
+
+    Sirve como Big-M por reacción en `construir_optknock(..., cotas=...)`.
+    Si se entrega `archivo` (JSON) los resultados quedan guardados con una
+    llave que depende del modelo, y las corridas siguientes sobre el mismo
+    modelo los leen en vez de repetir el FVA.
+    """
+    reacciones = [r.id for r in modelo.reactions] if reacciones is None else list(reacciones)
+    guardadas = {}
+    if archivo is not None and os.path.exists(archivo):
+        with open(archivo) as f:
+            guardadas = json.load(f)
+    llave = _huella(modelo)
+    cotas = {rid: tuple(valores) for rid, valores in guardadas.get(llave, {}).items()}
+
+    faltantes = [rid for rid in reacciones if rid not in cotas]
+    if faltantes:
+        fva = flux_variability_analysis(modelo, faltantes, fraction_of_optimum=0, processes=processes)
+        cotas.update((rid, (float(fila.minimum), float(fila.maximum))) for rid, fila in fva.iterrows())
+        if archivo is not None:
+            guardadas[llave] = {rid: list(valores) for rid, valores in cotas.items()}
+            with open(archivo, "w") as f:
+                json.dump(guardadas, f)
+    return {rid: cotas[rid] for rid in reacciones}
@@ -0,0 +1,224 @@
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+
+import pandas as pd
+from optlang import interface
+
+from carga import cargar_modelo
+from optknock import construir_optknock
+
+# El MILP de OptKnock fuera de cobra: se exporta una vez a MPS/LP y el mismo
+# archivo se resuelve con cualquier solver instalado (HiGHS y CBC no
+# necesitan licencia). Así se puede correr y comparar sin Gurobi. Los
+# estados de cada solver se traducen a las constantes de optlang
+# ("optimal", "infeasible", "time_limit", ...), las mismas que da cobra.
+
+_ESTADOS_HIGHS = {
+    "kOptimal": interface.OPTIMAL,
+    "kInfeasible": interface.INFEASIBLE,
+    "kUnboundedOrInfeasible": interface.INFEASIBLE_OR_UNBOUNDED,
+    "kUnbounded": interface.UNBOUNDED,
+    "kTimeLimit": interface.TIME_LIMIT,
+    "kIterationLimit": interface.ITERATION_LIMIT,
+    "kSolutionLimit": interface.SOLUTION_LIMIT,
+    "kMemoryLimit": interface.MEMORY_LIMIT,
+    "kInterrupt": interface.INTERRUPTED,
+}
+# Primera línea del archivo de solución de CBC
+_ESTADOS_CBC = (
+    ("Optimal", interface.OPTIMAL),
+    ("Infeasible", interface.INFEASIBLE),
+    ("Integer infeasible", interface.INFEASIBLE),
+    ("Unbounded", interface.UNBOUNDED),
+    ("Stopped on time", interface.TIME_LIMIT),
+    ("Stopped on iterations", interface.ITERATION_LIMIT),
+    ("Stopped on solutions", interface.SOLUTION_LIMIT),
+)
+_ESTADOS_GUROBI = {2: interface.OPTIMAL, 3: interface.INFEASIBLE, 4: interface.INFEASIBLE_OR_UNBOUNDED,
+                   5: interface.UNBOUNDED, 7: interface.ITERATION_LIMIT, 8: interface.NODE_LIMIT,
+                   9: interface.TIME_LIMIT, 10: interface.SOLUTION_LIMIT, 11: interface.INTERRUPTED,
+                   13: interface.SUBOPTIMAL}
+
+
+def exportar(problema, archivo):
+    """Escribe el MILP armado por `construir_optknock` a `archivo` (.mps o .lp).
+
+    Usa el escritor del solver que tenga el modelo (GLPK, Gurobi o CPLEX).
+    """
+    modelo = problema["modelo"]
+    modelo.solver.update()
+    interfaz = modelo.solver.interface.__name__
+    lp = archivo.endswith(".lp")
+    if interfaz in ("optlang.glpk_interface", "optlang.glpk_exact_interface"):
+        import swiglpk
+        if lp:
+            codigo = swiglpk.glp_write_lp(modelo.solver.problem, None, archivo)
+        else:
+            codigo = swiglpk.glp_write_mps(modelo.solver.problem, swiglpk.GLP_MPS_FILE, None, archivo)
+        if codigo != 0:
+            raise IOError(f"GLPK no pudo escribir {archivo}")
+    elif interfaz in ("optlang.gurobi_interface", "optlang.cplex_interface"):
+        modelo.solver.problem.write(archivo)
+    else:
+        raise ValueError(f"No se puede exportar desde {interfaz}; usar glpk, gurobi o cplex.")
+    return archivo
+
+
+def _resolver_highs(archivo, limite_tiempo):
+    import highspy
+    h = highspy.Highs()
+    h.setOptionValue("output_flag", False)
+    if limite_tiempo is not None:
+        h.setOptionValue("time_limit", float(limite_tiempo))
+    h.readModel(archivo)
+    h.run()
+    info = h.getInfo()
+    estado = _ESTADOS_HIGHS.get(h.getModelStatus().name, interface.UNDEFINED)
+    if info.primal_solution_status != 2:
+        return estado, math.nan, math.nan, math.nan, {}
+    nombres = h.getLp().col_names_
+    valores = dict(zip(nombres, h.getSolution().col_value))
+    return estado, info.objective_function_value, info.mip_dual_bound, info.mip_gap, valores
+
+
+def _resolver_cbc(archivo, limite_tiempo):
+    with tempfile.TemporaryDirectory() as carpeta:
+        salida = os.path.join(carpeta, "solucion.txt")
+        comando = ["cbc", archivo] + ([] if limite_tiempo is None else ["sec", str(limite_tiempo)])
+        log = subprocess.run(comando + ["solve", "solu", salida], capture_output=True, text=True).stdout
+        if not os.path.exists(salida):
+            return interface.ABORTED, math.nan, math.nan, math.nan, {}
+        with open(salida) as f:
+            lineas = f.read().splitlines()
+    estado = next((constante for texto, constante in _ESTADOS_CBC if lineas[0].startswith(texto)),
+                  interface.UNDEFINED)
+    # Columnas del archivo de solución: índice, nombre, valor, costo reducido
+    valores = {partes[1]: float(partes[2]) for partes in (linea.replace("**", "").split() for linea in lineas[1:])
+               if len(partes) >= 3}
+    objetivo = re.search(r"Objective value:\s+(\S+)", log)
+    cota = re.search(r"Lower bound:\s+(\S+)", log)
+    gap = re.search(r"Gap:\s+(\S+)", log)
+    return (estado, float(objetivo.group(1)) if objetivo else math.nan, float(cota.group(1)) if cota else math.nan,
+            float(gap.group(1)) if gap else math.nan, valores)
+
+
+def _resolver_glpk(archivo, limite_tiempo):
+    import swiglpk
+    prob = swiglpk.glp_create_prob()
+    if archivo.endswith(".lp"):
+        swiglpk.glp_read_lp(prob, None, archivo)
+    else:
+        swiglpk.glp_read_mps(prob, swiglpk.GLP_MPS_FILE, None, archivo)
+    parametros = swiglpk.glp_iocp()
+    swiglpk.glp_init_iocp(parametros)
+    parametros.presolve = swiglpk.GLP_ON
+    parametros.msg_lev = swiglpk.GLP_MSG_OFF
+    if limite_tiempo is not None:
+        parametros.tm_lim = int(limite_tiempo * 1000)
+    swiglpk.glp_intopt(prob, parametros)
+    codigo = swiglpk.glp_mip_status(prob)
+    estado = {swiglpk.GLP_OPT: interface.OPTIMAL, swiglpk.GLP_FEAS: interface.FEASIBLE,
+              swiglpk.GLP_NOFEAS: interface.INFEASIBLE}.get(codigo, interface.UNDEFINED)
+    valores = {}
+    objetivo = math.nan
+    if codigo in (swiglpk.GLP_OPT, swiglpk.GLP_FEAS):
+        objetivo = swiglpk.glp_mip_obj_val(prob)
+        valores = {swiglpk.glp_get_col_name(prob, j): swiglpk.glp_mip_col_val(prob, j)
+                   for j in range(1, swiglpk.glp_get_num_cols(prob) + 1)}
+    swiglpk.glp_delete_prob(prob)
+    # GLPK no entrega la cota fuera de un callback: solo se sabe el gap si terminó
+    gap = 0.0 if codigo == swiglpk.GLP_OPT else math.nan
+    return estado, objetivo, objetivo if gap == 0.0 else math.nan, gap, valores
+
+
+def _resolver_gurobi(archivo, limite_tiempo):
+    import gurobipy
+    m = gurobipy.read(archivo)
+    m.Params.OutputFlag = 0
+    if limite_tiempo is not None:
+        m.Params.TimeLimit = limite_tiempo
+    m.optimize()
+    estado = _ESTADOS_GUROBI.get(m.Status, interface.UNDEFINED)
+    if m.SolCount == 0:
+        return estado, math.nan, m.ObjBound, math.nan, {}
+    return estado, m.ObjVal, m.ObjBound, m.MIPGap, {v.VarName: v.X for v in m.getVars()}
+
+
+_RESOLVEDORES = {"highs": _resolver_highs, "cbc": _resolver_cbc, "glpk": _resolver_glpk, "gurobi": _resolver_gurobi}
+
+
+def solvers_disponibles():
+    disponibles = []
+    for nombre, modulo in (("highs", "highspy"), ("glpk", "swiglpk"), ("gurobi", "gurobipy")):
+        try:
+            __import__(modulo)
+            disponibles.append(nombre)
+        except ImportError:
+            pass
+    if shutil.which("cbc") is not None:
+        disponibles.append("cbc")
+    return disponibles
+
+
+def resolver_archivo(archivo, solver="highs", limite_tiempo=None):
+    """Resuelve un MILP exportado con `exportar`.
+
+    Retorna un diccionario con estado (constante de optlang, igual para
+    todos los solvers), objetivo, cota, gap, segundos, cortes (reacciones
+    con y_j = 0) y valores (variable -> valor).
+    """
+    inicio = time.perf_counter()
+    estado, objetivo, cota, gap, valores = _RESOLVEDORES[solver](archivo, limite_tiempo)
+    return {
+        "estado": estado,
+        "objetivo": objetivo,
+        "cota": cota,
+        "gap": gap,
+        "segundos": time.perf_counter() - inicio,
+        "cortes": [nombre[2:] for nombre, valor in valores.items() if nombre.startswith("y_") and valor < 0.1],
+        "valores": valores,
+    }
+
+
+def comparar_solvers(archivo_modelo, solvers=None, limite_tiempo=None, archivo_mps="optknock.mps", archivo=None,
+                     **opciones):
+    """Arma el MILP una vez y lo resuelve con cada solver de `solvers` (todos los disponibles por defecto).
+
+    Las opciones (biomasa, objetivos, K, f, M, candidatos, cotas, ...) pasan
+    a `construir_optknock`. El armado se hace con GLPK, que siempre está.
+    Retorna una tabla con una fila por solver: tiempos de armado,
+    exportación y resolución, estado, objetivo, cota, gap y cortes. Con
+    `archivo` además la guarda como CSV.
+    """
+    inicio = time.perf_counter()
+    modelo = cargar_modelo(archivo_modelo, solver="glpk")
+    problema = construir_optknock(modelo, **opciones)
+    modelo.solver.update()
+    t_armado = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    exportar(problema, archivo_mps)
+    t_exportacion = time.perf_counter() - inicio
+
+    filas = []
+    for solver in solvers_disponibles() if solvers is None else solvers:
+        print(f"Resolviendo con {solver}")
+        resultado = resolver_archivo(archivo_mps, solver, limite_tiempo)
+        filas.append({"Solver": solver, "Armado": t_armado, "Exportacion": t_exportacion,
+                      "Resolucion": resultado["segundos"], "Estado": resultado["estado"],
+                      "Objetivo": resultado["objetivo"], "Cota": resultado["cota"], "Gap": resultado["gap"],
+                      "Genes": ", ".join(resultado["cortes"])})
+    df = pd.DataFrame(filas)
+    if archivo is not None:
+        df.to_csv(archivo, index=False)
+    return df
+
+
+if __name__ == "__main__":
+    df = comparar_solvers("macrofago_limpio.json", limite_tiempo=3600, archivo="comparacion_solvers.csv", K=5, f=0.1)
+    print(df)
@@ -0,0 +1,153 @@
+import ctypes
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Progreso del MILP mientras se resuelve (incumbente, cota, gap, nodos).
+# optlang no deja pasar callbacks al solver, así que se lee el log: durante
+# la resolución la salida estándar del proceso (descriptor 1, donde escriben
+# GLPK y Gurobi desde C) se redirige a un pipe, cada línea se marca con el
+# tiempo transcurrido y se parsea.
+
+
+def _buscar_stdout():
+    # El FILE* de la salida estándar de C: "stdout" en glibc, "__stdoutp" en
+    # macOS. Sin él (Windows, otra libc) no hay telemetría
+    try:
+        libc = ctypes.CDLL(None)
+    except (OSError, TypeError):
+        return None, None
+    for nombre in ("stdout", "__stdoutp"):
+        try:
+            return libc, ctypes.c_void_p.in_dll(libc, nombre)
+        except ValueError:
+            pass
+    return None, None
+
+
+_libc, _stdout = _buscar_stdout()
+
+# Gurobi: "H   12    3    -    -    -   20.00000   12.34560  38.3%   5.1    2s"
+_GUROBI = re.compile(r"^\s*[H*]?\s*(\d+)\+?\s+\d+\s.*\s(\S+)\s+(\S+)\s+(\S+%|-)\s+(\S+)\s+\d+s$")
+# GLPK: "+   1234: mip =   1.234e+01 >=   1.000e+00  91.9% (12; 3)" (">>>>>" si mejoró el incumbente)
+_GLPK = re.compile(r"^\+\s*\d+: (?:mip =|>>>>>)\s+(not found yet|\S+)\s+[<>]=\s+(tree is empty|\S+)\s+(\S+%)?\s*"
+                   r"\((\d+); (\d+)\)")
+
+
+def _numero(texto):
+    texto = texto.rstrip("%")
+    try:
+        return float(texto)
+    except ValueError:
+        return float("nan")
+
+
+def _parsear(linea):
+    m = _GUROBI.match(linea)
+    if m:
+        nodos, incumbente, cota, gap, _ = m.groups()
+        return int(nodos), _numero(incumbente), _numero(cota), _numero(gap) / 100
+    m = _GLPK.match(linea)
+    if m:
+        incumbente, cota, gap, activos, resueltos = m.groups()
+        return int(activos) + int(resueltos), _numero(incumbente), _numero(cota), _numero(gap or "-") / 100
+    return None
+
+
+def _configurar_log(modelo):
+    # Encender el log del solver; se retorna cómo dejarlo como estaba
+    interfaz = modelo.solver.interface.__name__
+    if interfaz == "optlang.glpk_interface":
+        iocp = modelo.solver.configuration._iocp
+        antes = (modelo.solver.configuration.verbosity, iocp.out_frq)
+        modelo.solver.configuration.verbosity = 3  # con menos optlang apaga la salida de GLPK
+        iocp.out_frq = 500  # una línea cada medio segundo
+
+        def restaurar():
+            modelo.solver.configuration.verbosity = antes[0]
+            iocp.out_frq = antes[1]
+        return restaurar
+    antes = modelo.solver.configuration.verbosity
+    modelo.solver.configuration.verbosity = 3
+    return lambda: setattr(modelo.solver.configuration, "verbosity", antes)
+
+
+# Marca cada línea con la hora en que llega. Corre en otro proceso porque
+# GLPK no suelta el GIL mientras resuelve: un hilo de Python no alcanzaría a
+# leer hasta que termine.
+_LECTOR = """import sys, time
+for linea in sys.stdin:
+    sys.stdout.write(repr(time.time()) + "\\t" + linea)
+    sys.stdout.flush()
+"""
+
+
+@contextmanager
+def _linea_por_linea():
+    # Con la salida en un pipe, el C del solver la guarda en búfer y las
+    # líneas llegarían todas juntas al final. Al salir se deja como C la
+    # deja al partir: por líneas en un terminal y con búfer completo si no
+    modo = 1 if os.isatty(1) else 0  # _IOLBF, _IOFBF
+    _libc.fflush(None)
+    _libc.setvbuf(_stdout, None, 1, 0)
+    try:
+        yield
+    finally:
+        _libc.fflush(None)
+        _libc.setvbuf(_stdout, None, modo, 0)
+
+
+@contextmanager
+def registrar_progreso(modelo, eco=False):
+    """Registra el progreso del solver mientras dura el bloque `with`.
+
+    Entrega una lista que se llena con diccionarios (Segundos, Incumbente,
+    Cota, Gap, Nodos), uno por línea de progreso del log, al salir del
+    bloque. Se entienden los logs de GLPK y Gurobi; con otros solvers queda
+    vacía. Con `eco` el log también se muestra en pantalla. Si no se
+    encuentra la salida estándar de C (por ejemplo en Windows) no se toca
+    nada y la lista queda vacía.
+    """
+    registros = []
+    if _stdout is None:
+        yield registros
+        return
+    restaurar = _configurar_log(modelo)
+    sys.stdout.flush()
+    with _linea_por_linea():
+        original = os.dup(1)
+        lectura, escritura = os.pipe()
+        lector = subprocess.Popen([sys.executable, "-c", _LECTOR], stdin=lectura, stdout=subprocess.PIPE,
+                                  errors="replace", text=True)
+        os.close(lectura)
+        os.dup2(escritura, 1)
+        os.close(escritura)
+        inicio = time.time()
+
+        def leer():
+            for linea in lector.stdout:
+                hora, _, linea = linea.partition("\t")
+                if eco:
+                    os.write(original, linea.encode())
+                progreso = _parsear(linea.rstrip())
+                if progreso is not None:
+                    nodos, incumbente, cota, gap = progreso
+                    registros.append({"Segundos": round(float(hora) - inicio, 3), "Incumbente": incumbente,
+                                      "Cota": cota, "Gap": gap, "Nodos": nodos})
+
+        hilo = threading.Thread(target=leer, daemon=True)
+        hilo.start()
+        try:
+            yield registros
+        finally:
+            _libc.fflush(None)
+            sys.stdout.flush()
+            os.dup2(original, 1)  # cierra el último extremo de escritura: el lector recibe EOF
+            os.close(original)
+            hilo.join()
+            lector.wait()
+            restaurar()
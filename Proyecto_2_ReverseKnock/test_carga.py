@@ -0,0 +1,46 @@
+import pickle
+
+import pytest
+from cobra.io import load_model, save_json_model
+
+import carga
+from carga import cargar_modelo, prestar_modelo
+
+
+@pytest.fixture
+def archivo(tmp_path):
+    ruta = str(tmp_path / "textbook.json")
+    save_json_model(load_model("textbook"), ruta)
+    return ruta
+
+
+def modelo_en_cache(archivo):
+    with open(archivo + ".cache", "rb") as f:
+        pickle.load(f)
+        return pickle.load(f)
+
+
+def test_cache_se_guarda_con_glpk(archivo):
+    modelo = cargar_modelo(archivo, solver="scipy")
+    assert modelo.solver.interface.__name__ == "optlang.scipy_interface"
+    assert modelo_en_cache(archivo).solver.interface.__name__ == "optlang.glpk_interface"
+
+
+@pytest.mark.parametrize("dano", ["basura", "truncado"])
+def test_cache_danado_vuelve_al_json(archivo, dano):
+    esperado = cargar_modelo(archivo).slim_optimize()
+    with open(archivo + ".cache", "rb") as f:
+        datos = f.read()
+    with open(archivo + ".cache", "wb") as f:
+        f.write(b"no es un pickle" if dano == "basura" else datos[:len(datos) // 2])
+    carga._modelos.clear()
+
+    assert cargar_modelo(archivo).slim_optimize() == pytest.approx(esperado)
+    assert len(modelo_en_cache(archivo).reactions) == len(load_model("textbook").reactions)
+
+
+def test_prestar_modelo_deshace_los_cambios(archivo):
+    with prestar_modelo(archivo) as modelo:
+        modelo.reactions.PGI.knock_out()
+    with prestar_modelo(archivo) as modelo:
+        assert modelo.reactions.PGI.bounds == (-1000, 1000)
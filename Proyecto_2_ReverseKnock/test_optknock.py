@@ -0,0 +1,133 @@
+import random
+
+import pytest
+from cobra import Metabolite, Model, Reaction
+
+from optknock import construir_optknock, prohibir, resolver_optknock
+from preproceso import comprimir_red, cotas_fva
+
+# El MILP de optknock.py contra la formulación original de tierlist.py
+# (armada término a término con expresiones, como antes), sobre redes
+# chicas al azar. Los dos tienen que dar el mismo óptimo o ser los dos
+# infactibles, minimizando o maximizando el objetivo.
+
+pytestmark = pytest.mark.filterwarnings("ignore:Solver status")
+
+
+def red_azar(semilla):
+    # 5 metabolitos, captación de A, biomasa (consume D), objetivo (consume
+    # E), dos intercambios más y 8 reacciones internas cortables
+    azar = random.Random(semilla)
+    mets = [Metabolite(k, compartment="c") for k in "ABCDE"]
+
+    def reaccion(rid, estequiometria, lb=0, ub=1000):
+        r = Reaction(rid, lower_bound=lb, upper_bound=ub)
+        r.add_metabolites(estequiometria)
+        return r
+
+    reacciones = [reaccion("EX_a", {mets[0]: -1}, -10, 0), reaccion("BIO", {mets[3]: -1}),
+                  reaccion("Ta", {mets[4]: -1}, 0, azar.choice([5, 1000]))]
+    for k, met in enumerate(azar.sample(mets[1:], 2)):
+        reacciones.append(reaccion(f"EX_{k}", {met: -1}, azar.choice([0, -3]), azar.choice([2, 5, 1000])))
+    for i in range(1, 9):
+        a, b = azar.sample(mets, 2)
+        reacciones.append(reaccion(f"R{i}", {a: -1, b: 1}, azar.choice([0, 0, -1000]), azar.choice([1000, 1000, 4, 6])))
+    modelo = Model("azar")
+    modelo.add_reactions(reacciones)
+    modelo.solver = "glpk"
+    prohibidos = azar.sample([f"R{i}" for i in range(1, 9)], azar.randint(0, 2))
+    return modelo, prohibidos
+
+
+def optimo_original(modelo, prohibidos=(), sentido="min", biomasa="BIO", objetivos=("Ta",), K=2, f=0.1, M=3000,
+                    M_dual=10000, coef_inc=0.0001, holgura=0.1):
+    # correr_optknock de tierlist.py antes de optknock.py
+    prob = modelo.problem
+    biomasa_rxn = modelo.reactions.get_by_id(biomasa)
+    objetivos = [modelo.reactions.get_by_id(rid) for rid in objetivos]
+    validos = [r for r in modelo.reactions
+               if r != biomasa_rxn and r not in objetivos and "EX_" not in r.id and r.id not in prohibidos]
+    y = {r.id: prob.Variable("y_" + r.id, type="binary") for r in validos}
+    lam = {met.id: prob.Variable("lambda" + met.id, lb=-M_dual, ub=M_dual) for met in modelo.metabolites}
+    mu_ub = {r.id: prob.Variable("mu_ub" + r.id, lb=0, ub=M_dual) for r in modelo.reactions}
+    mu_lb = {r.id: prob.Variable("mu_lb" + r.id, lb=0, ub=M_dual) for r in modelo.reactions}
+    modelo.add_cons_vars([*y.values(), *lam.values(), *mu_ub.values(), *mu_lb.values()])
+
+    restricciones = []
+    for r in validos:
+        restricciones.append(prob.Constraint(r.flux_expression - M * y[r.id], ub=0))
+        if r.lower_bound < 0:
+            restricciones.append(prob.Constraint(-M * y[r.id] - r.flux_expression, ub=0))
+    restricciones.append(prob.Constraint(sum(1 - v for v in y.values()), ub=K))
+    for r in modelo.reactions:
+        c_j = 1 if r == biomasa_rxn else coef_inc if r in objetivos else 0
+        suma = sum(coef * lam[met.id] for met, coef in r.metabolites.items())
+        restricciones.append(prob.Constraint(suma + mu_ub[r.id] - mu_lb[r.id] - c_j, lb=0, ub=0))
+    for r in validos:
+        restricciones.append(prob.Constraint(mu_ub[r.id] - M * (1 - y[r.id]), ub=0))
+        restricciones.append(prob.Constraint(mu_lb[r.id] - M * (1 - y[r.id]), ub=0))
+
+    terminos = []
+    for r in modelo.reactions:
+        val_up, val_lb = min(r.upper_bound, M), max(r.lower_bound, -M)
+        if r.id in y:
+            z_u = prob.Variable("z_u_" + r.id, lb=0, ub=M_dual)
+            z_l = prob.Variable("z_l_" + r.id, lb=0, ub=M_dual)
+            modelo.add_cons_vars([z_u, z_l])
+            for z, mu in ((z_u, mu_ub[r.id]), (z_l, mu_lb[r.id])):
+                restricciones += [prob.Constraint(z - M_dual * y[r.id], ub=0), prob.Constraint(z - mu, ub=0),
+                                  prob.Constraint(mu - z - M_dual * (1 - y[r.id]), ub=0)]
+            terminos.append(z_u * val_up - z_l * val_lb)
+        else:
+            terminos.append(mu_ub[r.id] * val_up - mu_lb[r.id] * val_lb)
+    primal = biomasa_rxn.flux_expression + coef_inc * sum(r.flux_expression for r in objetivos)
+    restricciones.append(prob.Constraint(primal - sum(terminos), lb=-holgura, ub=holgura))
+    restricciones.append(prob.Constraint(biomasa_rxn.flux_expression, lb=f))
+    modelo.add_cons_vars(restricciones)
+    modelo.objective = prob.Objective(sum(r.flux_expression for r in objetivos), direction=sentido)
+    solucion = modelo.optimize()
+    return solucion.objective_value if solucion.status == "optimal" else None
+
+
+def optimo_nuevo(modelo, prohibidos=(), sentido="min", **opciones):
+    problema = construir_optknock(modelo, biomasa="BIO", objetivos=("Ta",), K=2, f=0.1, **opciones)
+    modelo.objective.direction = sentido
+    prohibir(problema, prohibidos)
+    return resolver_optknock(problema)[1]
+
+
+def mismo_optimo(a, b):
+    return (a is None and b is None) or (a is not None and b is not None and a == pytest.approx(b, abs=1e-3))
+
+
+@pytest.mark.parametrize("semilla", range(20))
+@pytest.mark.parametrize("sentido", ["min", "max"])
+def test_igual_al_original(semilla, sentido):
+    modelo, prohibidos = red_azar(semilla)
+    original = optimo_original(modelo, prohibidos, sentido)
+    modelo, prohibidos = red_azar(semilla)
+    assert mismo_optimo(optimo_nuevo(modelo, prohibidos, sentido), original)
+
+
+@pytest.mark.parametrize("semilla", range(20))
+@pytest.mark.parametrize("sentido", ["min", "max"])
+def test_cotas_fva_igual_al_original(semilla, sentido):
+    # Las cotas de FVA solo cambian las constantes Big-M; no pueden podar
+    # duales (con la semilla 0 maximizando, podarlos cambiaba 3 por 0.1)
+    modelo, prohibidos = red_azar(semilla)
+    original = optimo_original(modelo, prohibidos, sentido)
+    modelo, prohibidos = red_azar(semilla)
+    cotas = cotas_fva(modelo)
+    assert mismo_optimo(optimo_nuevo(modelo, prohibidos, sentido, cotas=cotas), original)
+
+
+# Redes en que sacar candidatos (bloqueadas, letales o acopladas) como
+# reacciones con cotas cambiaba el óptimo o la factibilidad
+@pytest.mark.parametrize("semilla", [18, 29, 42, 53, 54, 57, 61, 76, 77, 78, 81, 85, 92])
+@pytest.mark.parametrize("sentido", ["min", "max"])
+def test_comprimido_igual_al_completo(semilla, sentido):
+    modelo, _ = red_azar(semilla)
+    completo = optimo_nuevo(modelo, sentido=sentido)
+    modelo, _ = red_azar(semilla)
+    red = comprimir_red(modelo, biomasa="BIO", objetivos=("Ta",), f=0.1)
+    assert mismo_optimo(optimo_nuevo(modelo, sentido=sentido, candidatos=red["candidatos"]), completo)
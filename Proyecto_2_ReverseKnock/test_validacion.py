@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+from test_optknock import red_azar
+from validacion import modelo_glpk, validar_estrategias
+
+pytestmark = pytest.mark.filterwarnings("ignore:Solver status")
+
+
+def test_validar_en_procesos_igual_que_en_serie():
+    # Un solver que no es GLPK: los procesos tienen que recibir una copia con GLPK
+    modelo, _ = red_azar(0)
+    modelo.solver = "scipy"
+    tabla = pd.DataFrame({"Genes": ["R1", "R2, R5", "R3, R4", float("nan"), "R6, R7, R8"]})
+    serie = validar_estrategias(modelo, tabla, biomasa="BIO", objetivos=("Ta",))
+    procesos = validar_estrategias(modelo, tabla, biomasa="BIO", objetivos=("Ta",), n_jobs=2)
+    pd.testing.assert_frame_equal(procesos, serie, atol=1e-6)
+    assert serie.loc[3, ["Crecimiento_FBA", "Objetivo_min_FVA", "Objetivo_max_FVA"]].isna().all()
+    assert modelo.solver.interface.__name__ == "optlang.scipy_interface"
+
+
+def test_modelo_glpk_copia_solo_si_hace_falta():
+    modelo, _ = red_azar(0)
+    assert modelo_glpk(modelo) is modelo
+    modelo.solver = "scipy"
+    copia = modelo_glpk(modelo)
+    assert copia is not modelo
+    assert copia.solver.interface.__name__ == "optlang.glpk_interface"
+    assert modelo.solver.interface.__name__ == "optlang.scipy_interface"
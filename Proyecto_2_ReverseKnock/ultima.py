@@ -1,26 +1,9 @@
-import cobra
-
-from gurobipy import GRB
-from cobra import Reaction
+from carga import cargar_modelo
+from linealizacion import agregar_restriccion
 
 # carga limpia del modelo(Usando el JSON) (si no ponemos esto se llena como de mensajes y se ve feo jaja)
-model = cobra.io.load_json_model("macrofago_limpio.json")
-model.solver.problem.setParam('NonConvex', 2)
-
-# creamos atpm(Siempre necesaria porque el modelo base no traía esto)
-if "ATPM" not in model.reactions:
-    atpm = Reaction('ATPM')
-    atpm.name = 'ATP Maintenance'
-    atpm.lower_bound = 0
-    atpm.upper_bound = 1000
-    atpm.add_metabolites({
-        model.metabolites.atp_c: -1,
-        model.metabolites.h2o_c: -1,
-        model.metabolites.adp_c: 1,
-        model.metabolites.pi_c:  1,
-        model.metabolites.h_c:   1
-    })
-    model.add_reactions([atpm])
+# cargar_modelo ya trae la ATPM (Siempre necesaria porque el modelo base no traía esto)
+model = cargar_modelo("macrofago_limpio.json")
 
 # definimos las primeras cosas importantes:
 biomasa_rxn = model.reactions.ATPM
@@ -182,8 +165,9 @@ for r in model.reactions:
 
 
 suma_total = sum(resultados)
-const_dual = prob.Constraint(biomasa_rxn.flux_expression - suma_total, lb=0, ub=0, name="DualidadFuerte")
-model.add_cons_vars([const_dual])
+# Los productos mu * y se linealizan solos (McCormick, ver linealizacion.py):
+# queda un MILP y ya no hace falta NonConvex de Gurobi
+const_dual = agregar_restriccion(model, biomasa_rxn.flux_expression - suma_total, lb=0, ub=0, nombre="DualidadFuerte")
 
 # --- EJECUTAR ---
 
@@ -0,0 +1,108 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Validación de las estrategias que entrega el MILP: se aplican los cortes a
+# una red limpia y se revisa con FBA/FVA qué pasa en el problema interno. La
+# dualidad fuerte del MILP tiene un margen (holgura), así que el flujo
+# objetivo que reporta no siempre es el peor caso con crecimiento óptimo.
+_trabajador = {}
+
+
+def modelo_glpk(modelo):
+    """`modelo` si ya usa GLPK; si no, una copia con GLPK.
+
+    Para mandar el modelo a otros procesos: con Gurobi cada proceso abriría
+    su propio entorno (y licencia).
+    """
+    if modelo.solver.interface.__name__ == "optlang.glpk_interface":
+        return modelo
+    modelo = modelo.copy()
+    modelo.solver = "glpk"
+    return modelo
+
+
+def _iniciar(modelo, biomasa, tolerancia):
+    _trabajador.update(modelo=modelo, biomasa=biomasa, tolerancia=tolerancia)
+
+
+def evaluar_cortes(modelo, cortes, biomasa, objetivos, tolerancia=1e-6, sentidos=("min", "max")):
+    """Crecimiento máximo con `cortes` y, a ese crecimiento, el flujo de `objetivos` en cada sentido.
+
+    Trabaja dentro de `with modelo:`, así que el modelo queda como estaba.
+    Retorna una tupla (crecimiento, valor por sentido), todo NaN si el
+    modelo cortado es infactible.
+    """
+    with modelo:
+        for rid in cortes:
+            modelo.reactions.get_by_id(rid).knock_out()
+        biomasa = modelo.reactions.get_by_id(biomasa)
+        modelo.objective = biomasa
+        crecimiento = modelo.slim_optimize(error_value=np.nan)
+        if np.isnan(crecimiento):
+            return (np.nan,) * (1 + len(sentidos))
+
+        # Rango del objetivo entre todas las soluciones con crecimiento óptimo
+        biomasa.lower_bound = crecimiento - tolerancia
+        target = sum(modelo.reactions.get_by_id(rid).flux_expression for rid in objetivos)
+        valores = []
+        for sentido in sentidos:
+            modelo.objective = modelo.problem.Objective(target, direction=sentido)
+            valores.append(modelo.slim_optimize(error_value=np.nan))
+    return (crecimiento, *valores)
+
+
+def _evaluar(tarea):
+    cortes, objetivos = tarea
+    return evaluar_cortes(_trabajador["modelo"], cortes, _trabajador["biomasa"], objetivos, _trabajador["tolerancia"])
+
+
+def validar_estrategias(modelo, tabla, biomasa="ATPM", objetivos=("LDH_L", "EX_lac_L_LPAREN_e_RPAREN_"), n_jobs=1,
+                        tolerancia=1e-6):
+    """Revisa cada estrategia de `tabla` (columna Genes) con FBA y FVA del objetivo.
+
+    `modelo` debe ser la red sin el MILP (por ejemplo una copia tomada antes
+    de `construir_optknock`). Para cada fila se cortan las reacciones, se
+    maximiza `biomasa` y, fijando ese crecimiento, se minimiza y maximiza la
+    suma de los flujos de `objetivos` (o de la columna Objetivos, si la
+    tabla viene de `escenarios.correr_escenarios`). Con `n_jobs` > 1 (None o
+    negativo: todos los núcleos) las estrategias se reparten en procesos,
+    cada uno con una copia del modelo con GLPK; por defecto todo corre en
+    este proceso.
+
+    Las filas sin cortes (escenarios sin solución) no son estrategias: no se
+    evalúan y sus columnas quedan en NaN.
+
+    Retorna una copia de la tabla con las columnas Crecimiento_FBA,
+    Objetivo_min_FVA y Objetivo_max_FVA.
+    """
+    tareas = []
+    filas = []
+    for indice, fila in tabla.iterrows():
+        cortes = [rid for rid in str(fila["Genes"]).split(", ") if rid and rid != "nan"]
+        if not cortes:
+            continue
+        objetivos_fila = fila["Objetivos"].split(", ") if "Objetivos" in tabla.columns else list(objetivos)
+        tareas.append((cortes, objetivos_fila))
+        filas.append(indice)
+
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count()
+    n_jobs = max(1, min(n_jobs, len(tareas)))
+    if not tareas:
+        resultados = []
+    elif n_jobs == 1:
+        _iniciar(modelo, biomasa, tolerancia)
+        resultados = [_evaluar(tarea) for tarea in tareas]
+    else:
+        bloque = max(1, len(tareas) // (4 * n_jobs))
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_iniciar,
+                                 initargs=(modelo_glpk(modelo), biomasa, tolerancia)) as pool:
+            resultados = list(pool.map(_evaluar, tareas, chunksize=bloque))
+
+    validada = tabla.copy()
+    columnas = pd.DataFrame(resultados, columns=["Crecimiento_FBA", "Objetivo_min_FVA", "Objetivo_max_FVA"],
+                            index=filas, dtype=float).reindex(tabla.index)
+    return pd.concat([validada, columnas], axis=1)